@@ -1,9 +1,13 @@
+import os
+import sys
 import time
 
 from unittest import TestCase
 
 from chimerax.core.toolshed import BundleAPI
 
+from TestManager.params import parametrize
+
 
 class TestWithSession(TestCase):
     """test case with a session attribute"""
@@ -25,20 +29,40 @@ class TestWithSession(TestCase):
     "run the close command during setUp/tearDown"
     close_between_classes = True
     "run the close command during setUpClass/tearDownClass"
+    golden_dir = None
+    "directory with golden data - defaults to 'golden' next to the test's module"
+    update_golden = False
+    "overwrite golden data instead of comparing to it - set by the test command"
+    capture_log = False
+    "log output is being captured - set by the test command"
+    graphics = True
+    "set to False to pause drawing while the tests of this class run"
 
     @classmethod
     def addTests(cls, suite):
-        """discover test methods of cls and add them to suite"""
+        """
+        discover test methods of cls and add them to suite
+        parametrized methods are added as a LazySuite of CaseRefs
+        returns the test cases and CaseRefs that were added
+        """
+        from TestManager.params import is_parametrized, param_refs, LazySuite
+
         test_names = [
             key for key in cls.__dict__.keys() if key.startswith("test_")
         ]
         
         found_tests = []
         for test in test_names:
-            if callable(getattr(cls, test)):
-                test_cls = cls(test)
-                suite.addTest(test_cls)
-                found_tests.append(test_cls)
+            if not callable(getattr(cls, test)):
+                continue
+            if is_parametrized(getattr(cls, test)):
+                refs = LazySuite(param_refs(cls, test))
+                suite.addTest(refs)
+                found_tests.extend(refs.items())
+                continue
+            test_cls = cls(test)
+            suite.addTest(test_cls)
+            found_tests.append(test_cls)
 
         if not found_tests:
             test_cls = cls()
@@ -49,10 +73,18 @@ class TestWithSession(TestCase):
 
     @classmethod
     def setUpClass(cls):
-        """runs the close command if cls.close_between_classes"""
+        """
+        runs the close command if cls.close_between_classes
+        also pauses drawing if cls.graphics is False
+        """
         if cls.close_between_classes:
             from chimerax.core.commands import run
             run(cls.session, "close")
+        if not cls.graphics:
+            from TestManager.graphics import pause_graphics, resume_graphics
+            # class cleanups run even if setUpClass raises
+            if pause_graphics(cls.session):
+                cls.addClassCleanup(resume_graphics, cls.session)
 
     @classmethod
     def tearDownClass(cls):
@@ -78,20 +110,22 @@ class TestWithSession(TestCase):
         TestWithSession._prev_msg += ok_msg.format(TestWithSession._prev_test)
         TestWithSession._prev_test = ""
 
-        cls.session.logger.info(
-            "<pre>{}</pre>".format(TestWithSession._prev_msg),
-            is_html=True,
-            add_newline=False,
-        )
+        # the test command logs a summary instead
+        if not cls.capture_log:
+            cls.session.logger.info(
+                "<pre>{}</pre>".format(TestWithSession._prev_msg),
+                is_html=True,
+                add_newline=False,
+            )
 
-        cls.session.logger.info(
-            "<pre>Ran {} tests in {:.3f}s</pre>".format(
-                TestWithSession.count,
-                TestWithSession.total_time,
-            ),
-            is_html=True,
-        )
-        cls.session.logger.info("-" * 70)
+            cls.session.logger.info(
+                "<pre>Ran {} tests in {:.3f}s</pre>".format(
+                    TestWithSession.count,
+                    TestWithSession.total_time,
+                ),
+                is_html=True,
+            )
+            cls.session.logger.info("-" * 70)
         TestWithSession.total_time = 0
         TestWithSession.count = 0
         TestWithSession._prev_msg = ""
@@ -116,7 +150,7 @@ class TestWithSession(TestCase):
         elif TestWithSession._fails != fails:
             TestWithSession._fails = fails
             ok_msg = "{} FAIL"
-        elif self.id().split(".")[1] == self.last_class:
+        elif type(self).__name__ == self.last_class:
             ok_msg = "{} ok"
         if TestWithSession._prev_test:
             TestWithSession._prev_msg += ok_msg.format(TestWithSession._prev_test)
@@ -130,7 +164,8 @@ class TestWithSession(TestCase):
         t = time.time() - self.start_time
         TestWithSession.total_time += t
 
-        name = self.id().split(".")[-2:]
+        # parametrized test names can have dots in them
+        name = [type(self).__name__, self._testMethodName]
         if not TestWithSession.last_class or TestWithSession.last_class != name[0]:
             TestWithSession.last_class = name[0]
             TestWithSession.count = 0
@@ -148,28 +183,85 @@ class TestWithSession(TestCase):
             run(TestWithSession.session, "close")
 
     @classmethod
-    def open_tool(cls, name, tool_cls=None, log=True):
+    def golden_store(cls):
+        """GoldenStore for cls.golden_dir"""
+        from TestManager.golden import GoldenStore
+        golden_dir = cls.golden_dir
+        if golden_dir is None:
+            module = sys.modules[cls.__module__]
+            golden_dir = os.path.join(os.path.dirname(module.__file__), "golden")
+        return GoldenStore(golden_dir)
+
+    def assertStructureMatchesGolden(self, struc, key, thresh=None, msg=None):
+        """
+        compare the elements, bonds, and coordinates of struc to
+        the golden data saved under key
+        if there is no golden data for key or update_golden is True,
+        the golden data is saved instead
+        thresh: RMSD threshold - see validation.validate_atomic_structures
+        """
+        from TestManager.validation import structure_arrays, validate_structure_arrays
+        store = self.golden_store()
+        if self.update_golden or not store.exists(key):
+            store.save_structure(key, struc)
+            return
+
+        if not validate_structure_arrays(
+            structure_arrays(struc), store.load_structure(key), thresh=thresh
+        ):
+            raise self.failureException(self._formatMessage(
+                msg, "%s does not match golden structure %s" % (struc.atomspec, key)
+            ))
+
+    def assertVolumeMatchesGolden(self, volume, key, msg=None, **kwargs):
+        """
+        compare the values and grid of volume to the golden data
+        saved under key
+        if there is no golden data for key or update_golden is True,
+        the golden data is saved instead
+        kwargs are passed to validation.validate_volumes
+        """
+        from TestManager.validation import validate_volumes
+        store = self.golden_store()
+        if self.update_golden or not store.exists(key):
+            store.save_volume(key, volume)
+            return
+
+        result = validate_volumes(volume, store.load_volume(key), report=True, **kwargs)
+        if not result:
+            raise self.failureException(self._formatMessage(
+                msg, "volume does not match golden data %s\n%s" % (key, result.render())
+            ))
+
+    def graphics_enabled(self):
+        """
+        context manager for parts of a test that need to draw
+        frames while drawing is paused (graphics is False or the
+        tests were run with 'graphics false')
+        """
+        from TestManager.graphics import graphics_enabled
+        return graphics_enabled(self.session)
+
+    @classmethod
+    def open_tool(cls, name, tool_cls=None, log=True, timeout=5):
         """
         opens a tool with the specified name and returns the instance of that tool
         returns False if the tool does not open
         tool_cls: ToolInstance subclass corresponding to the name of the tool
              this is used if the tool's name isn't the same as the specified name
         log: log the command used to open the tool
+        timeout: maximum time (seconds) to wait for the tool to start
         """
         from chimerax.core.commands import run
+        # make sure the index exists before the tool starts so
+        # the tool instance added trigger isn't missed
+        tool_index = cls.session.test_manager.tool_index
         run(cls.session, "ui tool show \"%s\"" % name, log=log)
-        
-        opened_tool = False
-        for tool in cls.session.tools.list():
-            if tool_cls is not None:
-                if isinstance(tool, tool_cls):
-                    opened_tool = tool
-                    break
-            else:
-                if tool.tool_name == name:
-                    opened_tool = tool
-                    break
-        
+
+        opened_tool = tool_index.wait_for(name, tool_cls, timeout=timeout)
+        if opened_tool is None:
+            return False
+
         return opened_tool
 
 
@@ -186,6 +278,12 @@ class _TESTMANAGER_API(BundleAPI):
         if command_info.name == "test":
             from .commands.test import register_test_command
             register_test_command(logger)
+        if command_info.name == "test coordinator":
+            from .commands.test import register_test_coordinator_command
+            register_test_coordinator_command(logger)
+        if command_info.name == "test worker":
+            from .commands.test import register_test_worker_command
+            register_test_worker_command(logger)
         if command_info.name == "linter":
             from .commands.linter import register_linter_command
             register_linter_command(logger)
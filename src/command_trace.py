@@ -0,0 +1,211 @@
+import json
+import os
+import time
+
+from collections import namedtuple
+from functools import wraps
+from statistics import median
+
+
+TraceEvent = namedtuple(
+    "TraceEvent", ["text", "verb", "test", "start", "duration", "depth"]
+)
+"""
+text: command text
+verb: name of the command (e.g. "open" or "ui tool show")
+test: id of the test that was running, or None
+start: seconds since the trace started
+duration: seconds
+depth: 0 for commands run by the test, >0 for commands run by other commands
+"""
+
+TRACE_FORMATS = ("json", "chrome")
+
+
+class CommandTrace:
+    """
+    records every ChimeraX command that runs while the trace is active
+
+    with CommandTrace() as trace:
+        run(session, "open 1abc")
+    print(trace.report())
+    """
+    def __init__(self):
+        self.events = []
+        self.tests = []
+        "(test id, start, duration) for each test"
+        self.current_test = None
+        self._test_start = None
+        self._depth = 0
+        self._start = None
+        self._original_run = None
+
+    def __enter__(self):
+        from chimerax.core.commands import cli
+
+        self._start = time.perf_counter()
+        self._original_run = cli.Command.run
+        original_run = self._original_run
+        trace = self
+
+        @wraps(original_run)
+        def run(cmd, text, *args, **kwargs):
+            return trace._record(original_run, cmd, text, args, kwargs)
+
+        cli.Command.run = run
+        return self
+
+    def __exit__(self, *args):
+        from chimerax.core.commands import cli
+        cli.Command.run = self._original_run
+        self._original_run = None
+
+    def _now(self):
+        return time.perf_counter() - self._start
+
+    def _record(self, original_run, cmd, text, args, kwargs):
+        start = self._now()
+        self._depth += 1
+        try:
+            return original_run(cmd, text, *args, **kwargs)
+        finally:
+            self._depth -= 1
+            verb = getattr(cmd, "command_name", None)
+            if not verb:
+                words = text.split()
+                verb = words[0] if words else ""
+            self.events.append(TraceEvent(
+                text, verb, self.current_test, start, self._now() - start, self._depth
+            ))
+
+    def start_test(self, test_id):
+        self.current_test = test_id
+        self._test_start = self._now()
+
+    def stop_test(self):
+        if self.current_test is not None:
+            self.tests.append(
+                (self.current_test, self._test_start, self._now() - self._test_start)
+            )
+        self.current_test = None
+
+    def _top_level(self):
+        return [event for event in self.events if event.depth == 0]
+
+    def by_verb(self):
+        """
+        returns {verb: (count, total, median, max)} for commands run
+        directly by tests (times in seconds)
+        """
+        durations = {}
+        for event in self._top_level():
+            durations.setdefault(event.verb, []).append(event.duration)
+        return {
+            verb: (len(times), sum(times), median(times), max(times))
+            for verb, times in durations.items()
+        }
+
+    def by_test(self):
+        """returns {test id: {verb: total seconds}}"""
+        tests = {}
+        for event in self._top_level():
+            verbs = tests.setdefault(event.test, {})
+            verbs[event.verb] = verbs.get(event.verb, 0) + event.duration
+        return tests
+
+    def slowest(self, n=10):
+        """the n slowest commands run directly by tests"""
+        return sorted(self._top_level(), key=lambda event: -event.duration)[:n]
+
+    def report(self, max_lines=15):
+        """text summary of the time spent in each command"""
+        top = self._top_level()
+        lines = [
+            "%i commands took %.3fs" % (len(top), sum(event.duration for event in top)),
+            "",
+            "    %-24s %6s %12s %12s %12s" % (
+                "command", "count", "total (ms)", "median (ms)", "max (ms)"
+            ),
+        ]
+        verbs = sorted(self.by_verb().items(), key=lambda item: -item[1][1])
+        for verb, (count, total, med, longest) in verbs[:max_lines]:
+            lines.append("    %-24s %6i %12.1f %12.1f %12.1f" % (
+                verb, count, 1000 * total, 1000 * med, 1000 * longest
+            ))
+
+        lines.extend(["", "slowest commands:"])
+        for event in self.slowest(max_lines):
+            lines.append("    %10.1f ms  %s  (%s)" % (
+                1000 * event.duration, event.text, event.test
+            ))
+
+        tests = sorted(
+            self.by_test().items(), key=lambda item: -sum(item[1].values())
+        )
+        lines.extend(["", "time in commands per test:"])
+        for test, verbs in tests[:max_lines]:
+            verb, t = max(verbs.items(), key=lambda item: item[1])
+            lines.append("    %10.1f ms  %s  (most in %s: %.1f ms)" % (
+                1000 * sum(verbs.values()), test, verb, 1000 * t
+            ))
+
+        return "\n".join(lines)
+
+    def to_json(self):
+        """trace as a dict that can be saved as JSON"""
+        return {
+            "commands": [event._asdict() for event in self.events],
+            "tests": [
+                {"test": test, "start": start, "duration": duration}
+                for test, start, duration in self.tests
+            ],
+            "by_verb": {
+                verb: dict(zip(["count", "total", "median", "max"], stats))
+                for verb, stats in self.by_verb().items()
+            },
+        }
+
+    def to_chrome(self):
+        """
+        trace in the Chrome trace event format (for chrome://tracing
+        or Perfetto)
+        """
+        pid = os.getpid()
+        events = []
+        for test, start, duration in self.tests:
+            events.append({
+                "name": test, "cat": "test", "ph": "X", "pid": pid, "tid": 0,
+                "ts": 1e6 * start, "dur": 1e6 * duration,
+            })
+        for event in self.events:
+            events.append({
+                "name": event.verb, "cat": "command", "ph": "X", "pid": pid, "tid": 0,
+                "ts": 1e6 * event.start, "dur": 1e6 * event.duration,
+                "args": {"command": event.text, "test": event.test},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save(self, filename, format="json"):
+        """format: one of TRACE_FORMATS"""
+        if format not in TRACE_FORMATS:
+            raise ValueError("unknown trace format: %s" % format)
+        data = self.to_chrome() if format == "chrome" else self.to_json()
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+
+
+def traced_result(resultclass, trace):
+    """
+    returns a subclass of resultclass that tells trace which test
+    is running
+    """
+    class TracedResult(resultclass):
+        def startTest(self, test):
+            trace.start_test(test.id())
+            super().startTest(test)
+
+        def stopTest(self, test):
+            super().stopTest(test)
+            trace.stop_test()
+
+    return TracedResult
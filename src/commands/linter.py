@@ -15,25 +15,67 @@ def register_linter_command(logger):
     register("linter", desc, linter)
 
 def linter(session, files, linter="flake8"):
+    """
+    run linter on files
+    pyflakes and pycodestyle are run in this process if they are
+    installed, and results are cached until the file changes
+    other linters (including flake8) are run once in a new process
+    with all of the files
+    returns a list of TestManager.lint.Diagnostic
+    """
+    from TestManager.lint import IN_PROCESS_LINTERS
+
+    if linter in IN_PROCESS_LINTERS:
+        try:
+            return _lint_in_process(session, files, linter)
+        except ImportError as e:
+            session.logger.info(
+                "running %s in a new process (%s)" % (linter, e)
+            )
+
+    return _lint_subprocess(session, files, linter)
+
+def _lint_in_process(session, files, linter):
+    from html import escape
+
+    engine = session.test_manager.lint_engine
+    diagnostics = []
     for fname in files:
         session.logger.info("linting %s" % fname)
+        file_diagnostics = engine.check(fname, linter)
+        diagnostics.extend(file_diagnostics)
+        session.logger.info(
+            "<pre>%s</pre>" % escape("\n".join(
+                "%s:%i:%i: %s %s" % d for d in file_diagnostics
+            )),
+            is_html=True,
+        )
 
-        args = [
-            sys.executable,
-            "-m", linter, fname,
-        ]
+    return diagnostics
 
-        session.logger.info(" ".join(args))
+def _lint_subprocess(session, files, linter):
+    from TestManager.lint import parse_output
 
-        proc = subprocess.Popen(
-            args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-        )
+    session.logger.info("linting %s" % ", ".join(files))
 
-        out, err = proc.communicate()
+    args = [
+        sys.executable,
+        "-m", linter, *files,
+    ]
 
-        session.logger.info(
-            "<pre>%s</pre>" % out.decode("utf-8"), is_html=True
-        )
-        session.logger.warning(
-            "<pre>%s</pre>" % err.decode("utf-8"), is_html=True
-        )
+    session.logger.info(" ".join(args))
+
+    proc = subprocess.Popen(
+        args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+
+    out, err = proc.communicate()
+
+    session.logger.info(
+        "<pre>%s</pre>" % out.decode("utf-8"), is_html=True
+    )
+    session.logger.warning(
+        "<pre>%s</pre>" % err.decode("utf-8"), is_html=True
+    )
+
+    return parse_output(out.decode("utf-8"))
@@ -1,12 +1,32 @@
+from contextlib import ExitStack
 from cProfile import Profile
 import pstats
+import subprocess
+import time
 
 from chimerax.core.commands import (
-    CmdDesc, DynamicEnum, ListOf, register, BoolArg
+    CmdDesc, DynamicEnum, ListOf, register, BoolArg, NonNegativeIntArg, FloatArg,
+    IntArg, StringArg, PositiveIntArg, Annotation, AnnotationError, next_token,
+    EnumOf, SaveFileNameArg, OpenFileNameArg,
 )
 
 from TestManager.stream_holder import StreamHolder
 
+class ShardArg(Annotation):
+    """i/N, where 1 <= i <= N"""
+    name = "a shard (e.g. 1/4)"
+
+    @staticmethod
+    def parse(text, session):
+        token, text, rest = next_token(text)
+        try:
+            i, n = [int(x) for x in token.split("/")]
+        except ValueError:
+            raise AnnotationError("expected a shard like 1/4, got %s" % token)
+        if n < 1 or not 1 <= i <= n:
+            raise AnnotationError("shard must be between 1/N and N/N, got %s" % token)
+        return (i, n), text, rest
+
 def get_test_names(session):
     names = ["all"]
     for name in session.test_manager.tests:
@@ -27,16 +47,198 @@ def register_test_command(logger):
             ),
             ("profile", BoolArg),
         ],
+        keyword=[
+            ("retries", NonNegativeIntArg),
+            ("quarantine", FloatArg),
+            ("update", BoolArg),
+            ("shard", ShardArg),
+            ("timings", OpenFileNameArg),
+            ("save_timings", SaveFileNameArg),
+            ("fork", BoolArg),
+            ("jobs", PositiveIntArg),
+            ("profile_imports", BoolArg),
+            ("match", StringArg),
+            ("trace", BoolArg),
+            ("trace_file", SaveFileNameArg),
+            ("trace_format", EnumOf(["json", "chrome"])),
+            ("capture_log", BoolArg),
+            ("graphics", BoolArg),
+        ],
         synopsis="test the specifed component or 'all'",
     )
 
     register("test", desc, test)
 
-def test(session, test_names=["all"], profile=False):
+def register_test_coordinator_command(logger):
+    desc = CmdDesc(
+        optional=[
+            (
+                "test_names",
+                ListOf(
+                    DynamicEnum(
+                        lambda session=logger.session: get_test_names(session)
+                    )
+                )
+            ),
+        ],
+        keyword=[
+            ("host", StringArg),
+            ("port", NonNegativeIntArg),
+            ("local_workers", NonNegativeIntArg),
+            ("shard_size", PositiveIntArg),
+        ],
+        synopsis="distribute tests to 'test worker' processes",
+    )
+
+    register("test coordinator", desc, test_coordinator)
+
+def register_test_worker_command(logger):
+    desc = CmdDesc(
+        required=[("host", StringArg), ("port", IntArg)],
+        keyword=[("worker_id", StringArg)],
+        synopsis="run tests handed out by a 'test coordinator'",
+    )
+
+    register("test worker", desc, test_worker)
+
+def discover_tests(session, names, suite, load_times=None, profiler=None):
+    """
+    add the tests for each provider in names to suite
+    load_times: dict to fill with {provider: seconds for run_provider}
+    profiler: ImportProfiler to label with the provider being loaded
+    returns {provider: [test case]}
+    """
+    cls_by_name = {}
+    for name in names:
+        if profiler is not None:
+            profiler.provider = name
+        start = time.perf_counter()
+        case = session.test_manager.tests[name].run_provider(
+            session, name, session.test_manager
+        )
+        if load_times is not None:
+            load_times[name] = time.perf_counter() - start
+        cls_by_name[name] = case.addTests(suite)
+
+    return cls_by_name
+
+def select_tests(cls_by_name, keep):
+    """
+    returns a new suite and {provider: [test case]} with only the
+    test cases for which keep(case) is True
+    """
+    from TestManager.params import LazySuite
+
+    suite = LazySuite()
+    selected = {}
+    for name, cases in cls_by_name.items():
+        selected[name] = [case for case in cases if keep(case)]
+        suite.addTests(selected[name])
+
+    return suite, selected
+
+def id_matcher(pattern):
+    """
+    returns a function that is True for test ids that contain pattern
+    or match it as a wildcard pattern
+    only * and ? are wildcards - brackets are matched literally, so
+    the ids of parametrized tests (e.g. "test_open[1abc]") can be used
+    """
+    import re
+
+    regex = re.compile(
+        "".join(
+            ".*" if c == "*" else "." if c == "?" else re.escape(c)
+            for c in pattern
+        ),
+        re.DOTALL,
+    )
+    return lambda test_id: pattern in test_id or regex.fullmatch(test_id) is not None
+
+def test(
+    session,
+    test_names=["all"],
+    profile=False,
+    retries=0,
+    quarantine=0.2,
+    update=False,
+    shard=None,
+    timings=None,
+    save_timings=None,
+    fork=False,
+    jobs=1,
+    profile_imports=False,
+    match=None,
+    trace=False,
+    trace_file=None,
+    trace_format="json",
+    capture_log=False,
+    graphics=True,
+):
+    """
+    run the tests for each provider in test_names
+    retries: number of times to rerun tests that fail or have an error
+    quarantine: tests that have been flaky in more than this fraction
+        of their recent runs are quarantined - quarantined tests still
+        run, but their failures are reported as "quarantined"
+    update: save new golden data instead of comparing to it
+    shard: (i, N) - only run the i-th of N deterministic partitions of
+        the tests (1 <= i <= N)
+        tests are balanced using the durations in the timings file, or
+        split by a hash of their ids if there is no timings file
+    timings: JSON file of {test id: seconds} used to balance shards
+        every job must be given the same file
+    save_timings: after the tests run, save the average duration of
+        each test in the results history to this file (for timings)
+    fork: run each test class in a process forked from this one after
+        the tests have been imported (nogui sessions on Linux/macOS only)
+    jobs: with fork, the number of test classes to run at once
+    match: only run tests with an id that contains this text or matches
+        it as a wildcard pattern (e.g. "*.test_open[1a*]") - only * and ?
+        are wildcards
+    profile_imports: log how long each provider took to load and the
+        modules that took the longest to import
+    trace: record every command run during the tests and log the time
+        spent in each command
+    trace_file: save the command trace to this file (implies trace)
+    trace_format: "json" or "chrome" (trace event format for
+        chrome://tracing or Perfetto)
+    capture_log: keep log messages in memory while tests run instead of
+        showing them - the messages from each failing test are added
+        to its result, and a summary is logged when the tests are done
+    graphics: False to pause drawing new frames while the tests run
+        (tests can use TestWithSession.graphics_enabled to draw)
+    returns {provider: {test case: (status, message)}} and profile stats
+    """
+    import os
     from unittest import TestSuite, TextTestRunner
 
+    from chimerax.core.errors import UserError
+
+    from TestManager import TestWithSession
+    from TestManager.results import TestManagerResult, results_by_provider
+
+    if not 0 <= quarantine <= 1:
+        raise UserError("quarantine must be between 0 and 1, got %g" % quarantine)
+    if fork and (session.ui.is_gui or not hasattr(os, "fork")):
+        raise UserError("fork can only be used in nogui sessions on Linux or macOS")
+    trace = trace or trace_file is not None
+    if trace and fork:
+        raise UserError("commands cannot be traced in forked processes")
+
     suite = TestSuite()
-    runner = TextTestRunner()
+    resultclass = TestManagerResult
+    command_trace = None
+    if trace:
+        from TestManager.command_trace import CommandTrace, traced_result
+        command_trace = CommandTrace()
+        resultclass = traced_result(resultclass, command_trace)
+    log_capture = None
+    if capture_log:
+        from TestManager.log_capture import LogCapture, captured_result
+        log_capture = LogCapture(session.logger)
+        resultclass = captured_result(resultclass, log_capture)
+    runner = TextTestRunner(resultclass=resultclass)
     stats = None
 
     if any(name == "all" for name in test_names):
@@ -44,18 +246,86 @@ def test(session, test_names=["all"], profile=False):
     else:
         names = test_names
 
-    cls_by_name = {}
-    for name in names:
-        case = session.test_manager.tests[name].run_provider(
-            session, name, session.test_manager
+    if profile_imports:
+        from TestManager.import_profiler import ImportProfiler, format_load_report
+        load_times = {}
+        with ImportProfiler() as profiler:
+            cls_by_name = discover_tests(
+                session, names, suite, load_times=load_times, profiler=profiler
+            )
+        session.logger.info(
+            "<pre>%s</pre>" % format_load_report(load_times, profiler.records),
+            is_html=True,
         )
-        cls_by_name[name] = case.addTests(suite)
+    else:
+        cls_by_name = discover_tests(session, names, suite)
+
+    if match is not None:
+        matches = id_matcher(match)
+        suite, cls_by_name = select_tests(
+            cls_by_name, lambda case: matches(case.id())
+        )
+
+    history = session.test_manager.history
+    if shard is not None:
+        from TestManager.sharding import partition, load_timings
+        i, n = shard
+        all_ids = [case.id() for cases in cls_by_name.values() for case in cases]
+        # durations must not come from the history, which changes as
+        # each job records its results
+        durations = load_timings(timings) if timings is not None else None
+        shard_ids = set(partition(all_ids, n, durations)[i - 1])
+        suite, cls_by_name = select_tests(
+            cls_by_name, lambda case: case.id() in shard_ids
+        )
+        session.logger.info(
+            "running shard %i/%i: %i of %i tests" % (i, n, len(shard_ids), len(all_ids))
+        )
+    quarantined = history.quarantined(
+        quarantine,
+        tests=[case.id() for cases in cls_by_name.values() for case in cases],
+    )
 
     if profile:
         profile = Profile()
         profile.enable()
 
-    results = runner.run(suite)
+    cases = [case for cases in cls_by_name.values() for case in cases]
+    prev_update = TestWithSession.update_golden
+    prev_capture = TestWithSession.capture_log
+    TestWithSession.update_golden = update
+    TestWithSession.capture_log = capture_log
+    try:
+        if fork:
+            from TestManager.forkserver import run_forked
+            run = lambda suite: run_forked(runner, suite, jobs=jobs)
+        else:
+            run = runner.run
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            if command_trace is not None:
+                stack.enter_context(command_trace)
+            if log_capture is not None:
+                stack.enter_context(log_capture)
+            if not graphics:
+                from TestManager.graphics import graphics_paused
+                stack.enter_context(graphics_paused(session))
+            results, attempts, flaky = run_with_retries(
+                session, run, suite, cases, retries
+            )
+        run_time = time.perf_counter() - start
+    finally:
+        TestWithSession.update_golden = prev_update
+        TestWithSession.capture_log = prev_capture
+
+    if command_trace is not None:
+        from html import escape
+        session.logger.info(
+            "<pre>%s</pre>" % escape(command_trace.report()), is_html=True
+        )
+        if trace_file is not None:
+            command_trace.save(trace_file, format=trace_format)
+            session.logger.info("saved command trace to %s" % trace_file)
 
     if profile:
         profile.disable()
@@ -64,42 +334,185 @@ def test(session, test_names=["all"], profile=False):
         stats = stream._msg
         stream.flush()
 
+    results_by_name = results_by_provider(results, cls_by_name)
+
+    ignored = set()
+    for name in results_by_name:
+        for case, (status, msg) in results_by_name[name].items():
+            if status not in ["fail", "error"] or case.id() not in quarantined:
+                continue
+            ignored.add(case.id())
+            results_by_name[name][case] = (
+                "quarantined",
+                "%s quarantined (flaky in %.0f%% of recent runs)\n%s" % (
+                    case.id(), 100 * quarantined[case.id()], msg
+                ),
+            )
+
+    if flaky:
+        session.logger.warning(
+            "flaky tests (passed after a retry):\n    %s" % "\n    ".join(sorted(flaky))
+        )
+    if ignored:
+        session.logger.warning(
+            "failures of quarantined tests were ignored:\n    %s" % "\n    ".join(sorted(ignored))
+        )
+    if log_capture is not None:
+        from TestManager.log_capture import summary_html
+        session.logger.info(summary_html(results_by_name, run_time), is_html=True)
+
+    history.record_run(
+        results_by_name,
+        durations=results.durations,
+        attempts=attempts,
+        flaky=flaky,
+        quarantined=ignored,
+        description=" ".join(names),
+    )
+
+    if save_timings is not None:
+        from TestManager.sharding import save_timings as save_timings_file
+        save_timings_file(save_timings, history.durations())
+        session.logger.info("saved test timings to %s" % save_timings)
+
+    return results_by_name, stats
+
+
+def run_with_retries(session, run, suite, cases, retries):
+    """
+    run(suite), then rerun anything in cases that failed or had an
+    error up to `retries` times, using a new instance of the test case
+    cases: test cases and CaseRefs in suite
+    returns the result of the first run (updated with the outcomes
+    and durations of any retries), the number of attempts for each
+    test, and a set of tests that passed after being retried
+    """
+    from TestManager.params import CaseRef, LazySuite, make_case
+
+    results = run(suite)
+    attempts = {case.id(): 1 for case in cases}
+    flaky = set()
+
+    failed = [
+        case for case in cases if results.outcome(case)[0] in ["fail", "error"]
+    ]
+    for attempt in range(0, retries):
+        if not failed:
+            break
+        session.logger.info(
+            "retrying %i failed test%s" % (len(failed), "s" if len(failed) > 1 else "")
+        )
+        retry_suite = LazySuite()
+        for case in failed:
+            # CaseRefs make a new test case each time they run
+            retry_suite.addTest(case if isinstance(case, CaseRef) else make_case(case))
+        retry_results = run(retry_suite)
+        still_failed = []
+        for case in failed:
+            attempts[case.id()] += 1
+            status, msg = retry_results.outcome(case)
+            results.outcomes[case.id()] = (status, msg)
+            if case.id() in retry_results.durations:
+                results.durations[case.id()] = retry_results.durations[case.id()]
+            if status in ["fail", "error"]:
+                still_failed.append(case)
+            else:
+                flaky.add(case.id())
+        failed = still_failed
+
+    return results, attempts, flaky
+
+
+def test_coordinator(
+    session,
+    test_names=["all"],
+    host="localhost",
+    port=0,
+    local_workers=0,
+    shard_size=None,
+):
+    """
+    hand out the tests for each provider in test_names to workers
+    started with the 'test worker' command
+    host, port: address to listen on - port 0 picks a free port
+    local_workers: number of worker processes to start on this machine
+    shard_size: number of tests given to a worker at a time
+    returns {provider: {test case: (status, message)}}
+    """
+    from unittest import TestSuite
+
+    from TestManager.distributed import (
+        Coordinator, start_local_workers, DEFAULT_SHARD_SIZE,
+    )
+
+    if any(name == "all" for name in test_names):
+        names = get_test_names(session)[1:]
+    else:
+        names = test_names
+
+    cls_by_name = discover_tests(session, names, TestSuite())
+    tests = [
+        (name, case.id()) for name, cases in cls_by_name.items() for case in cases
+    ]
+
+    history = session.test_manager.history
+    coordinator = Coordinator(
+        tests,
+        durations=history.durations(),
+        host=host,
+        port=port,
+        shard_size=shard_size or DEFAULT_SHARD_SIZE,
+    )
+    host, port = coordinator.address[:2]
+    session.logger.info(
+        "coordinating %i tests on %s:%i" % (len(tests), host, port)
+    )
+    coordinator.start()
+
+    processes = start_local_workers(host, port, local_workers)
+    start = time.perf_counter()
+    try:
+        results = coordinator.wait(processes=processes, log=session.logger.info)
+    finally:
+        coordinator.close()
+        for proc in processes:
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
     results_by_name = {}
-    for name, test_classes in cls_by_name.items():
+    durations = {}
+    for name, cases in cls_by_name.items():
         results_by_name[name] = {}
-        for test_class in test_classes:
-            added_test = False
-            for fail, exception in results.failures:
-                if test_class is fail:
-                    results_by_name[name][test_class] = ("fail", exception)
-                    added_test = True
-                    break
-
-            for error, exception in results.errors:
-                if test_class is error:
-                    results_by_name[name][test_class] = ("error", exception)
-                    added_test = True
-                    break
-
-            for fail, exception in results.expectedFailures:
-                if test_class is fail:
-                    results_by_name[name][test_class] = ("expected_failure", exception)
-                    added_test = True
-                    break
-
-            for success in results.unexpectedSuccesses:
-                if test_class is success:
-                    results_by_name[name][test_class] = ("unexpected_success", "I didn't expect to get this far...")
-                    added_test = True
-                    break
-
-            for skip, reason in results.skipped:
-                if test_class is skip:
-                    results_by_name[name][test_class] = ("skip", reason)
-                    added_test = True
-                    break
-
-            if not added_test:
-                results_by_name[name][test_class] = ("success", "success!")
-
-    return results_by_name, stats
\ No newline at end of file
+        for case in cases:
+            result = results[case.id()]
+            results_by_name[name][case] = (result["status"], result["message"])
+            durations[case.id()] = result["duration"]
+
+    counts = {}
+    for result in results.values():
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    session.logger.info(
+        "<pre>Ran {} tests on {} workers in {:.3f}s\n{}</pre>".format(
+            len(tests),
+            len(set(result["worker"] for result in results.values())),
+            time.perf_counter() - start,
+            "\n".join("    %-20s %i" % item for item in sorted(counts.items())),
+        ),
+        is_html=True,
+    )
+
+    history.record_run(
+        results_by_name,
+        durations=durations,
+        description="coordinator " + " ".join(names),
+    )
+
+    return results_by_name
+
+def test_worker(session, host, port, worker_id=None):
+    """run tests handed out by the coordinator at host:port"""
+    from TestManager.distributed import run_worker
+
+    run_worker(session, host, port, worker_id=worker_id)
@@ -0,0 +1,499 @@
+"""
+run tests on several worker processes (possibly on other machines)
+
+the coordinator holds the list of tests and hands out shards of tests
+to workers over a socket
+workers run each shard in their own session and send the outcome of
+each test back as soon as it finishes
+if a worker disconnects before finishing a shard, the tests it didn't
+report are put back in the queue for another worker
+workers send a heartbeat while a shard runs, so a worker is only
+considered dead if it stops sending messages, not if one test is slow
+
+messages are JSON objects, one per line:
+    worker -> coordinator
+        {"type": "hello", "worker": worker id}
+        {"type": "ready"}
+        {"type": "result", "shard": shard id, "provider": provider name,
+         "test": test id, "status": status, "message": message,
+         "duration": seconds}
+        {"type": "shard_done", "shard": shard id}
+        {"type": "heartbeat"}
+    coordinator -> worker
+        {"type": "shard", "shard": shard id, "tests": [[provider, test id], ...]}
+        {"type": "wait", "delay": seconds}
+        {"type": "done"}
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from collections import deque
+
+
+DEFAULT_SHARD_SIZE = 10
+WORKER_TIMEOUT = 600
+"seconds without a message before a worker is considered dead"
+HEARTBEAT_INTERVAL = 30
+"seconds between heartbeats from a worker that is running a shard"
+NO_WORKERS_TIMEOUT = 600
+"seconds the coordinator waits with no workers connected before giving up"
+MAX_REASSIGNMENTS = 3
+"tests that were on this many dead workers are reported as errors"
+
+
+def send_message(wfile, message):
+    wfile.write(json.dumps(message) + "\n")
+    wfile.flush()
+
+
+def read_message(rfile):
+    """returns the next message, or None if the connection was closed"""
+    line = rfile.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def make_shards(tests, durations=None, shard_size=DEFAULT_SHARD_SIZE):
+    """
+    split tests into shards of at most shard_size tests
+    tests: list of (provider, test id)
+    durations: {test id: seconds} from previous runs
+    tests are sorted by decreasing duration so the slowest tests are
+    handed out first, tests without a duration are assumed to take
+    the median time
+    """
+    durations = durations or {}
+    known = sorted(durations[test] for provider, test in tests if test in durations)
+    default = known[len(known) // 2] if known else 0
+    ordered = sorted(
+        tests, key=lambda t: (-durations.get(t[1], default), t[1])
+    )
+    return [
+        ordered[i:i + shard_size] for i in range(0, len(ordered), shard_size)
+    ]
+
+
+def worker_command(host, port):
+    """command to start a ChimeraX worker process"""
+    return [
+        sys.executable, "-m", "chimerax.core",
+        "--nogui", "--exit", "--silent",
+        "--cmd", "test worker %s %i" % (host, port),
+    ]
+
+
+class Coordinator:
+    """
+    hands out shards of tests to workers and collects their results
+    """
+    def __init__(
+        self,
+        tests,
+        durations=None,
+        host="localhost",
+        port=0,
+        shard_size=DEFAULT_SHARD_SIZE,
+        worker_timeout=WORKER_TIMEOUT,
+    ):
+        """
+        tests: list of (provider, test id)
+        durations: {test id: seconds} used to order the shards
+        port: port to listen on, 0 to pick any free port
+        """
+        self.tests = list(tests)
+        self.worker_timeout = worker_timeout
+        self.results = {}
+        "test id: {provider, status, message, duration, worker}"
+        self.events = []
+        "messages about workers, to be logged by the main thread"
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._shards = {}
+        self._next_shard_id = 0
+        self._reassignments = {}
+        self._connections = 0
+        self._closed = False
+        for shard in make_shards(self.tests, durations, shard_size):
+            self._queue.append(self._new_shard(shard))
+
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((host, port))
+        self._server.listen()
+        self.address = self._server.getsockname()
+        self._accept_thread = threading.Thread(target=self._accept, daemon=True)
+
+    def _new_shard(self, tests):
+        shard_id = self._next_shard_id
+        self._next_shard_id += 1
+        self._shards[shard_id] = tests
+        return shard_id
+
+    @property
+    def finished(self):
+        return len(self.results) >= len(self.tests)
+
+    def start(self):
+        """start accepting workers"""
+        self._accept_thread.start()
+
+    def close(self):
+        self._closed = True
+        try:
+            self._server.close()
+        except OSError:
+            pass
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                conn, addr = self._server.accept()
+            except OSError:
+                break
+            threading.Thread(
+                target=self._handle, args=(conn, addr), daemon=True
+            ).start()
+
+    def _handle(self, conn, addr):
+        """talk to one worker"""
+        conn.settimeout(self.worker_timeout)
+        rfile = conn.makefile("r", encoding="utf-8")
+        wfile = conn.makefile("w", encoding="utf-8")
+        worker = "%s:%i" % addr[:2]
+        shard_id = None
+        with self._cond:
+            self._connections += 1
+        try:
+            while True:
+                msg = read_message(rfile)
+                if msg is None:
+                    break
+                if msg["type"] == "hello":
+                    worker = msg.get("worker") or worker
+                    self._event("worker %s connected" % worker)
+                elif msg["type"] == "ready":
+                    reply = self._assign(worker)
+                    shard_id = reply.get("shard")
+                    send_message(wfile, reply)
+                    if reply["type"] == "done":
+                        break
+                elif msg["type"] == "result":
+                    self._add_result(msg, worker)
+                elif msg["type"] == "shard_done":
+                    self._requeue(msg["shard"], worker, died=False)
+                    shard_id = None
+                # heartbeats only reset the read timeout
+        except (OSError, ValueError) as e:
+            self._event("lost worker %s: %s" % (worker, e))
+        finally:
+            if shard_id is not None:
+                self._event("worker %s did not finish shard %i" % (worker, shard_id))
+                self._requeue(shard_id, worker, died=True)
+            with self._cond:
+                self._connections -= 1
+                self._cond.notify_all()
+            for f in (rfile, wfile, conn):
+                try:
+                    f.close()
+                except OSError:
+                    pass
+
+    def _event(self, msg):
+        with self._cond:
+            self.events.append(msg)
+            self._cond.notify_all()
+
+    def _assign(self, worker):
+        with self._cond:
+            if self.finished or self._closed:
+                return {"type": "done"}
+            if not self._queue:
+                return {"type": "wait", "delay": 1}
+            shard_id = self._queue.popleft()
+            return {
+                "type": "shard",
+                "shard": shard_id,
+                "tests": [list(test) for test in self._shards[shard_id]],
+            }
+
+    def _add_result(self, msg, worker):
+        with self._cond:
+            if msg["test"] in self.results:
+                return
+            self.results[msg["test"]] = {
+                "provider": msg["provider"],
+                "status": msg["status"],
+                "message": msg["message"],
+                "duration": msg.get("duration"),
+                "worker": worker,
+            }
+            self._cond.notify_all()
+
+    def _requeue(self, shard_id, worker, died):
+        """
+        put any tests from the shard that don't have results back
+        in the queue
+        """
+        with self._cond:
+            remaining = []
+            for provider, test in self._shards.pop(shard_id, []):
+                if test in self.results:
+                    continue
+                count = self._reassignments.get(test, 0) + 1
+                self._reassignments[test] = count
+                if not died or count >= MAX_REASSIGNMENTS:
+                    self.results[test] = {
+                        "provider": provider,
+                        "status": "error",
+                        "message": (
+                            "worker %s died while running this test" % worker
+                            if died else
+                            "worker %s did not report a result" % worker
+                        ),
+                        "duration": None,
+                        "worker": worker,
+                    }
+                else:
+                    remaining.append((provider, test))
+            if remaining:
+                self._queue.appendleft(self._new_shard(remaining))
+            self._cond.notify_all()
+
+    def wait(self, processes=None, poll=0.5, log=None, no_workers_timeout=NO_WORKERS_TIMEOUT):
+        """
+        wait until every test has a result
+        processes: local worker processes - if they all exit before the
+            tests are done, the remaining tests are reported as errors
+        log: function to call with messages about workers
+        no_workers_timeout: if no workers are connected for this many
+            seconds, the remaining tests are reported as errors
+        """
+        processes = processes or []
+        no_workers_since = time.monotonic()
+        with self._cond:
+            while not self.finished:
+                self._cond.wait(poll)
+                if log is not None:
+                    for msg in self.events:
+                        log(msg)
+                    self.events = []
+                if self._connections:
+                    no_workers_since = time.monotonic()
+                    continue
+                if processes and all(p.poll() is not None for p in processes):
+                    self._fail_remaining("all workers exited before this test ran")
+                elif time.monotonic() - no_workers_since > no_workers_timeout:
+                    self._fail_remaining(
+                        "no workers were connected for %i seconds" % no_workers_timeout
+                    )
+        return self.results
+
+    def _fail_remaining(self, message):
+        """report every test without a result as an error"""
+        for provider, test in self.tests:
+            if test not in self.results:
+                self.results[test] = {
+                    "provider": provider,
+                    "status": "error",
+                    "message": message,
+                    "duration": None,
+                    "worker": None,
+                }
+
+
+def start_local_workers(host, port, count):
+    """start count worker processes on this machine"""
+    processes = []
+    for i in range(0, count):
+        processes.append(subprocess.Popen(
+            worker_command(host, port),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        ))
+    return processes
+
+
+def run_worker(
+    session,
+    host,
+    port,
+    worker_id=None,
+    reconnect_attempts=5,
+    timeout=WORKER_TIMEOUT,
+    heartbeat_interval=HEARTBEAT_INTERVAL,
+):
+    """
+    connect to the coordinator at host:port and run shards of tests
+    until the coordinator says everything is done
+    if the connection is lost, try to reconnect up to
+    reconnect_attempts times in a row
+    while a shard runs, a heartbeat is sent every heartbeat_interval
+    seconds
+    """
+    from unittest import TextTestRunner
+
+    from TestManager.params import CaseRef, LazySuite, make_case
+
+    if worker_id is None:
+        worker_id = "%s-%i" % (socket.gethostname(), os.getpid())
+
+    test_classes = {}
+    failures = 0
+    while True:
+        try:
+            conn = socket.create_connection((host, port), timeout=timeout)
+        except OSError as e:
+            failures += 1
+            if failures > reconnect_attempts:
+                session.logger.error(
+                    "could not connect to coordinator at %s:%i: %s" % (host, port, e)
+                )
+                return
+            time.sleep(min(2 ** failures, 30))
+            continue
+
+        rfile = conn.makefile("r", encoding="utf-8")
+        wfile = conn.makefile("w", encoding="utf-8")
+        # the heartbeat thread writes to the same connection
+        send_lock = threading.Lock()
+
+        def send(message):
+            with send_lock:
+                send_message(wfile, message)
+
+        try:
+            send({"type": "hello", "worker": worker_id})
+            while True:
+                send({"type": "ready"})
+                msg = read_message(rfile)
+                if msg is None:
+                    raise ConnectionError("coordinator closed the connection")
+                failures = 0
+                if msg["type"] == "done":
+                    return
+                if msg["type"] == "wait":
+                    time.sleep(msg.get("delay", 1))
+                    continue
+
+                shard_id = msg["shard"]
+                heartbeat = _Heartbeat(send, heartbeat_interval)
+                heartbeat.start()
+                try:
+                    cases = {}
+                    suite = LazySuite()
+                    for provider, test in msg["tests"]:
+                        if provider not in test_classes:
+                            test_classes[provider] = _discover(session, provider)
+                        try:
+                            case = test_classes[provider][test]
+                        except KeyError:
+                            send(_result_message(
+                                shard_id, provider, test, "error",
+                                "test not found by worker %s" % worker_id, None,
+                            ))
+                            continue
+                        if not isinstance(case, CaseRef):
+                            case = make_case(case)
+                        cases[case.id()] = (provider, case)
+                        suite.addTest(case)
+
+                    def report(case, result):
+                        provider, _ = cases[case.id()]
+                        status, msg = result.outcome(case)
+                        send(_result_message(
+                            shard_id, provider, case.id(), status, msg,
+                            result.durations.get(case.id()),
+                        ))
+
+                    runner = TextTestRunner(resultclass=_streaming_result(report))
+                    results = runner.run(suite)
+                    # tests that didn't run (e.g. setUpClass failed)
+                    for test_id, (provider, case) in cases.items():
+                        if test_id not in results.outcomes:
+                            report(case, results)
+                finally:
+                    heartbeat.stop()
+
+                send({"type": "shard_done", "shard": shard_id})
+
+        except (OSError, ValueError) as e:
+            failures += 1
+            if failures > reconnect_attempts:
+                session.logger.error("lost connection to coordinator: %s" % e)
+                return
+            session.logger.warning(
+                "lost connection to coordinator, reconnecting: %s" % e
+            )
+            time.sleep(min(2 ** failures, 30))
+        finally:
+            for f in (rfile, wfile, conn):
+                try:
+                    f.close()
+                except OSError:
+                    pass
+
+
+class _Heartbeat:
+    """sends a heartbeat message every interval seconds until stopped"""
+    def __init__(self, send, interval):
+        self.send = send
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.send({"type": "heartbeat"})
+            except (OSError, ValueError):
+                # the main thread notices the lost connection
+                return
+
+
+def _discover(session, provider):
+    """returns {test id: test case or CaseRef} for the provider"""
+    from unittest import TestSuite
+    mgr = session.test_manager
+    cls = mgr.tests[provider].run_provider(session, provider, mgr)
+    return {case.id(): case for case in cls.addTests(TestSuite())}
+
+
+def _result_message(shard_id, provider, test, status, message, duration):
+    return {
+        "type": "result",
+        "shard": shard_id,
+        "provider": provider,
+        "test": test,
+        "status": status,
+        "message": str(message),
+        "duration": duration,
+    }
+
+
+def _streaming_result(callback):
+    """
+    returns a TestManagerResult subclass that calls
+    callback(test, result) after each test finishes
+    """
+    from TestManager.results import TestManagerResult
+
+    class StreamingResult(TestManagerResult):
+        def stopTest(self, test):
+            super().stopTest(test)
+            callback(test, self)
+
+    return StreamingResult
@@ -0,0 +1,187 @@
+import json
+import os
+import selectors
+import sys
+
+from unittest import TestSuite
+
+
+def iter_cases(suite):
+    """
+    yields the test cases in suite, including those in nested suites
+    cases in a LazySuite are yielded as CaseRefs
+    """
+    from TestManager.params import LazySuite
+
+    tests = suite.items() if isinstance(suite, LazySuite) else suite
+    for test in tests:
+        if isinstance(test, TestSuite):
+            yield from iter_cases(test)
+        else:
+            yield test
+
+
+def group_by_class(suite):
+    """returns [(test case class, [test case])] in the order of suite"""
+    from TestManager.params import case_class
+
+    groups = []
+    for case in iter_cases(suite):
+        cls = case_class(case)
+        if groups and cls is groups[-1][0]:
+            groups[-1][1].append(case)
+        else:
+            groups.append((cls, [case]))
+    return groups
+
+
+FORK_TIMEOUT = 1800
+"seconds a forked child has to run its test class before it is killed"
+
+
+def _run_child(write_fd, cases, resultclass):
+    """
+    run cases in a forked child and write one JSON line to write_fd
+    for each test as soon as it finishes
+    """
+    from unittest import TextTestRunner
+
+    from TestManager.params import LazySuite
+
+    code = 0
+    try:
+        out = os.fdopen(write_fd, "w", encoding="utf-8")
+
+        def send(test_id, status, msg, duration):
+            out.write(json.dumps({
+                "test": test_id, "status": status, "message": str(msg),
+                "duration": duration,
+            }) + "\n")
+            out.flush()
+
+        class StreamingResult(resultclass):
+            def stopTest(self, test):
+                super().stopTest(test)
+                if test.id() in self.outcomes:
+                    status, msg = self.outcomes[test.id()]
+                    send(test.id(), status, msg, self.durations.get(test.id()))
+
+        runner = TextTestRunner(resultclass=StreamingResult)
+        result = runner.run(LazySuite(cases))
+        # tests that didn't run (e.g. setUpClass failed)
+        for case in cases:
+            if case.id() not in result.outcomes:
+                status, msg = result.outcome(case)
+                send(case.id(), status, msg, None)
+        out.write(json.dumps({"tests_run": result.testsRun}) + "\n")
+        out.close()
+    except BaseException:
+        code = 1
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+        os._exit(code)
+
+
+def run_forked(runner, suite, jobs=1, timeout=FORK_TIMEOUT):
+    """
+    run each test class in suite in a child process forked from this one
+    children start with everything that has already been imported and
+    initialized in this process, but changes they make to the session
+    do not affect this process or other children
+    jobs: maximum number of children to run at once
+    timeout: seconds a child has to finish its test class before it
+        is killed
+    if a child dies, only the tests it had not reported are errors
+    returns a result like runner.run(suite) would
+    """
+    import signal
+    import time
+
+    result = runner._makeResult()
+    selector = selectors.DefaultSelector()
+    pending = group_by_class(suite)
+    pending.reverse()
+    running = {}
+
+    def start(cases):
+        read_fd, write_fd = os.pipe()
+        for stream in (sys.stdout, sys.stderr):
+            stream.flush()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            _run_child(write_fd, cases, runner.resultclass)
+        os.close(write_fd)
+        running[read_fd] = {
+            "pid": pid,
+            "cases": cases,
+            "buffer": b"",
+            "deadline": time.monotonic() + timeout,
+            "timed_out": False,
+            "reported": 0,
+        }
+        selector.register(read_fd, selectors.EVENT_READ)
+
+    def read_lines(child, chunk):
+        child["buffer"] += chunk
+        *lines, child["buffer"] = child["buffer"].split(b"\n")
+        for line in lines:
+            try:
+                data = json.loads(line.decode("utf-8"))
+            except ValueError:
+                continue
+            if "tests_run" in data:
+                child["tests_run"] = data["tests_run"]
+                continue
+            result.outcomes[data["test"]] = (data["status"], data["message"])
+            if data["duration"] is not None:
+                result.durations[data["test"]] = data["duration"]
+            child["reported"] += 1
+
+    def finish(read_fd):
+        selector.unregister(read_fd)
+        child = running.pop(read_fd)
+        os.close(read_fd)
+        _, status = os.waitpid(child["pid"], 0)
+        read_lines(child, b"\n")
+        if "tests_run" in child:
+            result.testsRun += child["tests_run"]
+            return
+        result.testsRun += child["reported"]
+        if child["timed_out"]:
+            msg = "test process was killed after %i seconds" % timeout
+        elif os.WIFSIGNALED(status):
+            msg = "test process was killed by signal %i" % os.WTERMSIG(status)
+        else:
+            msg = "test process exited with status %i" % os.WEXITSTATUS(status)
+        for case in child["cases"]:
+            if case.id() not in result.outcomes:
+                result.outcomes[case.id()] = ("error", msg)
+
+    while pending or running:
+        while pending and len(running) < jobs:
+            cls, cases = pending.pop()
+            start(cases)
+        now = time.monotonic()
+        for read_fd, child in running.items():
+            if not child["timed_out"] and now >= child["deadline"]:
+                child["timed_out"] = True
+                os.kill(child["pid"], signal.SIGKILL)
+        deadlines = [
+            child["deadline"] for child in running.values() if not child["timed_out"]
+        ]
+        wait = max(0, min(deadlines) - now) if deadlines else None
+        for key, events in selector.select(timeout=wait):
+            read_fd = key.fileobj
+            chunk = os.read(read_fd, 65536)
+            if chunk:
+                read_lines(running[read_fd], chunk)
+            else:
+                finish(read_fd)
+
+    selector.close()
+    return result
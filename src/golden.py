@@ -0,0 +1,99 @@
+import os
+
+
+class GoldenStore:
+    """
+    directory of reference ("golden") data for tests
+    each key is a subdirectory containing one .npy file per array
+    .npy files are used instead of a single .npz so that the arrays
+    can be memory-mapped when they are loaded
+    """
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, key):
+        """directory for key"""
+        directory = os.path.abspath(self.directory)
+        path = os.path.abspath(os.path.join(directory, key))
+        if os.path.isabs(key) or os.path.commonpath([directory, path]) != directory or path == directory:
+            raise ValueError("golden data key must be a relative path: %s" % key)
+        return path
+
+    def exists(self, key):
+        return os.path.isdir(self.path(key))
+
+    def save(self, key, arrays):
+        """
+        save arrays for key
+        arrays: {name: numpy array}
+        """
+        import numpy as np
+
+        path = self.path(key)
+        os.makedirs(path, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(path, "%s.npy" % name), np.ascontiguousarray(array))
+
+    def load(self, key, mmap_mode="r"):
+        """
+        returns {name: numpy array} for key
+        arrays are memory-mapped unless mmap_mode is None
+        """
+        import numpy as np
+
+        path = self.path(key)
+        if not os.path.isdir(path):
+            raise KeyError("no golden data for %s in %s" % (key, self.directory))
+
+        arrays = {}
+        for fname in os.listdir(path):
+            name, ext = os.path.splitext(fname)
+            if ext != ".npy":
+                continue
+            arrays[name] = np.load(os.path.join(path, fname), mmap_mode=mmap_mode)
+        return arrays
+
+    def save_structure(self, key, struc):
+        """save the elements, bonds, and coordinates of struc"""
+        from TestManager.validation import structure_arrays
+        self.save(key, structure_arrays(struc))
+
+    def load_structure(self, key):
+        """returns memory-mapped elements, bonds, and coordinates for key"""
+        return self.load(key)
+
+    def save_volume(self, key, volume, chunk_voxels=None):
+        """
+        save the values, origin, and step of a Volume or GridData
+        values are copied a few z planes at a time
+        """
+        import numpy as np
+        from TestManager.validation import _Grid, VOLUME_CHUNK_VOXELS
+
+        grid = _Grid(volume)
+        path = self.path(key)
+        os.makedirs(path, exist_ok=True)
+        nx, ny, nz = grid.size
+        planes = max(1, (chunk_voxels or VOLUME_CHUNK_VOXELS) // max(1, nx * ny))
+        matrix = None
+        for z in range(0, nz, planes):
+            block = np.asarray(grid.planes(z, min(z + planes, nz)))
+            if matrix is None:
+                matrix = np.lib.format.open_memmap(
+                    os.path.join(path, "matrix.npy"),
+                    mode="w+",
+                    dtype=block.dtype,
+                    shape=(nz, ny, nx),
+                )
+            matrix[z:z + len(block)] = block
+        if matrix is not None:
+            matrix.flush()
+            del matrix
+        self.save(key, {"origin": grid.origin, "step": grid.step})
+
+    def load_volume(self, key):
+        """
+        returns memory-mapped values, origin, and step for key
+        the result can be used as the ref for validation.validate_volumes
+        """
+        return self.load(key)
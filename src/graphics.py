@@ -0,0 +1,58 @@
+from contextlib import contextmanager
+
+
+_pause_counts = {}
+"id(session): number of pause_graphics calls that haven't been resumed"
+
+
+def pause_graphics(session):
+    """
+    stop drawing new frames until resume_graphics is called
+    the "new frame" trigger does not fire while drawing is paused
+    returns False if the session has no update loop
+    """
+    update_loop = getattr(session, "update_loop", None)
+    if update_loop is None:
+        return False
+    update_loop.block_redraw()
+    _pause_counts[id(session)] = _pause_counts.get(id(session), 0) + 1
+    return True
+
+
+def resume_graphics(session):
+    """undo one call to pause_graphics"""
+    session.update_loop.unblock_redraw()
+    count = _pause_counts.get(id(session), 0) - 1
+    if count > 0:
+        _pause_counts[id(session)] = count
+    else:
+        _pause_counts.pop(id(session), None)
+
+
+@contextmanager
+def graphics_paused(session):
+    """pause drawing inside the with block"""
+    paused = pause_graphics(session)
+    try:
+        yield
+    finally:
+        if paused:
+            resume_graphics(session)
+
+
+@contextmanager
+def graphics_enabled(session):
+    """
+    draw frames inside the with block, even if drawing was paused
+    by pause_graphics
+    redraws blocked by anything else stay blocked
+    """
+    update_loop = getattr(session, "update_loop", None)
+    num_blocks = _pause_counts.get(id(session), 0) if update_loop is not None else 0
+    for i in range(0, num_blocks):
+        update_loop.unblock_redraw()
+    try:
+        yield
+    finally:
+        for i in range(0, num_blocks):
+            update_loop.block_redraw()
@@ -0,0 +1,279 @@
+import os
+import sqlite3
+import time
+
+from collections import namedtuple
+
+
+FLAKY_WINDOW = 20
+"number of recent runs of a test used to compute its flakiness rate"
+MIN_RUNS_FOR_QUARANTINE = 5
+"a test must have run at least this many times before it can be quarantined"
+
+RunComparison = namedtuple(
+    "RunComparison", ["status_changes", "test_durations", "provider_durations"]
+)
+"""
+status_changes: [(provider, test id, status in run a, status in run b)]
+    status is None if the test was not in that run
+test_durations: [(provider, test id, duration a, duration b, b - a)]
+    sorted by the change in duration, biggest slowdown first
+provider_durations: [(provider, total duration a, total duration b, b - a)]
+    totals only include tests with a duration in both runs, and are
+    sorted the same way
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    description TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    provider TEXT NOT NULL,
+    test TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration REAL,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    flaky INTEGER NOT NULL DEFAULT 0,
+    quarantined INTEGER NOT NULL DEFAULT 0,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS results_by_test ON results(test, run_id);
+CREATE INDEX IF NOT EXISTS results_by_run ON results(run_id);
+CREATE INDEX IF NOT EXISTS results_by_provider ON results(provider, run_id);
+"""
+
+
+class ResultsHistory:
+    """
+    sqlite database of test outcomes from previous runs
+    each run of the test command adds one row to the runs table
+    and one row per test to the results table
+    """
+    def __init__(self, filename):
+        """filename: path to sqlite file, or ":memory:" """
+        if filename != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        self.filename = filename
+        self._db = sqlite3.connect(filename)
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def record_run(self, results_by_name, durations=None, attempts=None, flaky=None, quarantined=None, description=None):
+        """
+        add the results of a test run to the history
+        results_by_name: {provider: {test case: (status, message)}}
+        durations: {test id: seconds}
+        attempts: {test id: number of times the test was run}
+        flaky: set of test ids that failed and then passed on a retry
+        quarantined: set of test ids that were quarantined during this run
+        returns the id of the new run
+        """
+        durations = durations or {}
+        attempts = attempts or {}
+        flaky = flaky or set()
+        quarantined = quarantined or set()
+        with self._db:
+            cur = self._db.execute(
+                "INSERT INTO runs (started, description) VALUES (?, ?)",
+                (time.time(), description),
+            )
+            run_id = cur.lastrowid
+            rows = []
+            for name, results in results_by_name.items():
+                for case, (status, msg) in results.items():
+                    test_id = case.id()
+                    rows.append((
+                        run_id,
+                        name,
+                        test_id,
+                        status,
+                        durations.get(test_id),
+                        attempts.get(test_id, 1),
+                        int(test_id in flaky),
+                        int(test_id in quarantined),
+                        None if status == "success" else str(msg),
+                    ))
+            self._db.executemany(
+                "INSERT INTO results (run_id, provider, test, status, duration, "
+                "attempts, flaky, quarantined, message) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return run_id
+
+    def flakiness(self, window=FLAKY_WINDOW, tests=None):
+        """
+        returns {test id: (flaky rate, number of runs)} for each test,
+        using at most the last `window` runs of that test
+        a run is counted as flaky if the test failed and then
+        passed when it was retried
+        tests: only look up these test ids - each one reads at most
+            `window` rows using the results_by_test index, so the
+            cost doesn't grow with the size of the history
+        """
+        if tests is None:
+            cur = self._db.execute(
+                "SELECT test, AVG(flaky), COUNT(*) FROM ("
+                "    SELECT test, flaky, ROW_NUMBER() OVER ("
+                "        PARTITION BY test ORDER BY run_id DESC"
+                "    ) AS n FROM results"
+                ") WHERE n <= ? GROUP BY test",
+                (window,),
+            )
+            return {test: (rate, count) for test, rate, count in cur}
+
+        with self._db:
+            self._db.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS selected_tests (test TEXT PRIMARY KEY)"
+            )
+            self._db.execute("DELETE FROM selected_tests")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO selected_tests (test) VALUES (?)",
+                ((test,) for test in tests),
+            )
+            cur = self._db.execute(
+                "SELECT selected_tests.test, AVG(results.flaky), COUNT(*) "
+                "FROM selected_tests JOIN results ON results.rowid IN ("
+                "    SELECT rowid FROM results WHERE results.test = selected_tests.test "
+                "    ORDER BY run_id DESC LIMIT ?"
+                ") GROUP BY selected_tests.test",
+                (window,),
+            )
+            flakiness = {test: (rate, count) for test, rate, count in cur}
+            self._db.execute("DELETE FROM selected_tests")
+        return flakiness
+
+    def quarantined(self, threshold, window=FLAKY_WINDOW, min_runs=MIN_RUNS_FOR_QUARANTINE, tests=None):
+        """
+        returns {test id: flaky rate} for tests with a flaky rate
+        above threshold
+        tests: only check these test ids (see flakiness)
+        """
+        return {
+            test: rate for test, (rate, count) in self.flakiness(window, tests).items()
+            if count >= min_runs and rate > threshold
+        }
+
+    def durations(self, window=5):
+        """
+        returns {test id: average duration} using at most the
+        last `window` recorded durations of each test
+        """
+        cur = self._db.execute(
+            "SELECT test, AVG(duration) FROM ("
+            "    SELECT test, duration, ROW_NUMBER() OVER ("
+            "        PARTITION BY test ORDER BY run_id DESC"
+            "    ) AS n FROM results WHERE duration IS NOT NULL"
+            ") WHERE n <= ? GROUP BY test",
+            (window,),
+        )
+        return {test: duration for test, duration in cur}
+
+    def runs(self, limit=None):
+        """
+        returns [(run id, start time, description, number of tests,
+        number of failures and errors)], newest first
+        """
+        cur = self._db.execute(
+            "SELECT id, started, description, "
+            "    (SELECT COUNT(*) FROM results WHERE run_id = runs.id), "
+            "    (SELECT COUNT(*) FROM results WHERE run_id = runs.id "
+            "        AND status IN ('fail', 'error')) "
+            "FROM runs ORDER BY id DESC LIMIT ?",
+            (-1 if limit is None else limit,),
+        )
+        return cur.fetchall()
+
+    def latest_run(self):
+        """returns the id of the most recent run, or None"""
+        row = self._db.execute("SELECT MAX(id) FROM runs").fetchone()
+        return row[0]
+
+    def run_results(self, run_id):
+        """
+        returns {provider: {test id: (status, message)}} for a run
+        """
+        results = {}
+        cur = self._db.execute(
+            "SELECT provider, test, status, message FROM results WHERE run_id = ?",
+            (run_id,),
+        )
+        for provider, test, status, msg in cur:
+            results.setdefault(provider, {})[test] = (status, msg or "success!")
+        return results
+
+    def latest_results(self):
+        """
+        returns {provider: {test id: (status, message)}} from the most
+        recent run of each provider
+        """
+        results = {}
+        # step from one provider to the next and look up its latest run
+        # with the results_by_provider index instead of scanning results
+        cur = self._db.execute(
+            "WITH RECURSIVE providers(provider) AS ("
+            "    SELECT MIN(provider) FROM results"
+            "    UNION ALL"
+            "    SELECT (SELECT MIN(provider) FROM results"
+            "        WHERE results.provider > providers.provider)"
+            "    FROM providers WHERE providers.provider IS NOT NULL"
+            ") "
+            "SELECT results.provider, test, status, message FROM providers "
+            "JOIN results ON results.provider = providers.provider "
+            "AND results.run_id = ("
+            "    SELECT MAX(run_id) FROM results"
+            "    WHERE results.provider = providers.provider"
+            ")",
+        )
+        for provider, test, status, msg in cur:
+            results.setdefault(provider, {})[test] = (status, msg or "success!")
+        return results
+
+    def _run_rows(self, run_id):
+        """{test id: (provider, status, duration)} for a run"""
+        cur = self._db.execute(
+            "SELECT test, provider, status, duration FROM results WHERE run_id = ?",
+            (run_id,),
+        )
+        return {test: (provider, status, duration) for test, provider, status, duration in cur}
+
+    def compare(self, run_a, run_b):
+        """
+        compare the results of two runs
+        returns a RunComparison
+        """
+        rows_a = self._run_rows(run_a)
+        rows_b = self._run_rows(run_b)
+
+        status_changes = []
+        test_durations = []
+        totals = {}
+        for test in sorted(set(rows_a).union(rows_b)):
+            provider_a, status_a, duration_a = rows_a.get(test, (None, None, None))
+            provider_b, status_b, duration_b = rows_b.get(test, (None, None, None))
+            provider = provider_b or provider_a
+            if status_a != status_b:
+                status_changes.append((provider, test, status_a, status_b))
+            if duration_a is None or duration_b is None:
+                continue
+            test_durations.append(
+                (provider, test, duration_a, duration_b, duration_b - duration_a)
+            )
+            total_a, total_b = totals.get(provider, (0, 0))
+            totals[provider] = (total_a + duration_a, total_b + duration_b)
+
+        test_durations.sort(key=lambda row: -row[-1])
+        provider_durations = sorted(
+            (
+                (provider, total_a, total_b, total_b - total_a)
+                for provider, (total_a, total_b) in totals.items()
+            ),
+            key=lambda row: -row[-1],
+        )
+        return RunComparison(status_changes, test_durations, provider_durations)
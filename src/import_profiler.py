@@ -0,0 +1,142 @@
+import sys
+import time
+
+from collections import namedtuple
+
+
+ImportRecord = namedtuple(
+    "ImportRecord", ["module", "self_time", "cumulative", "depth", "provider"]
+)
+"""
+self_time: seconds spent executing the module itself
+cumulative: seconds including the modules it imported
+depth: how deeply nested the import was (0 for a top-level import)
+provider: name of the provider being loaded when the module was imported
+"""
+
+
+class _TimingLoader:
+    """wraps a module's loader to time exec_module"""
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        if hasattr(self._loader, "create_module"):
+            return self._loader.create_module(spec)
+        return None
+
+    def exec_module(self, module):
+        self._profiler._start()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._stop(module.__name__)
+            # don't leave the wrapper on the module
+            module.__loader__ = self._loader
+            if getattr(module, "__spec__", None) is not None:
+                module.__spec__.loader = self._loader
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+
+class _TimingFinder:
+    """meta path finder that wraps the loaders found by the other finders"""
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimingLoader(spec.loader, self._profiler)
+            return spec
+        return None
+
+    def invalidate_caches(self):
+        pass
+
+
+class ImportProfiler:
+    """
+    records how long each newly imported module takes to execute,
+    like python -X importtime but in-process
+    modules that were already imported are not included
+
+    with ImportProfiler() as profiler:
+        import something
+    profiler.records
+    """
+    def __init__(self):
+        self.records = []
+        self.provider = None
+        "set to label records with the provider being loaded"
+        self._finder = _TimingFinder(self)
+        self._stack = []
+
+    def __enter__(self):
+        sys.meta_path.insert(0, self._finder)
+        return self
+
+    def __exit__(self, *args):
+        try:
+            sys.meta_path.remove(self._finder)
+        except ValueError:
+            pass
+
+    def _start(self):
+        # [start time, time spent importing other modules]
+        self._stack.append([time.perf_counter(), 0.])
+
+    def _stop(self, name):
+        start, child_time = self._stack.pop()
+        cumulative = time.perf_counter() - start
+        if self._stack:
+            self._stack[-1][1] += cumulative
+        self.records.append(ImportRecord(
+            name, cumulative - child_time, cumulative, len(self._stack), self.provider
+        ))
+
+
+def import_times(records):
+    """returns {provider: seconds spent importing modules}"""
+    times = {}
+    for record in records:
+        if record.depth == 0:
+            times[record.provider] = times.get(record.provider, 0) + record.cumulative
+    return times
+
+
+def format_load_report(load_times, records, max_modules=30):
+    """
+    text report of provider load times and the slowest imports
+    load_times: {provider: seconds for run_provider}
+    records: ImportRecords
+    """
+    by_provider = import_times(records)
+
+    lines = ["provider load times:"]
+    lines.append("    %-30s %12s %12s" % ("provider", "total (ms)", "imports (ms)"))
+    for name, t in sorted(load_times.items(), key=lambda item: -item[1]):
+        lines.append("    %-30s %12.1f %12.1f" % (
+            name, 1000 * t, 1000 * by_provider.get(name, 0)
+        ))
+
+    shown = sorted(records, key=lambda record: -record.self_time)[:max_modules]
+    lines.append("")
+    lines.append("slowest imports (%i of %i modules):" % (len(shown), len(records)))
+    lines.append("    %10s %16s  %-20s %s" % ("self (ms)", "cumulative (ms)", "provider", "module"))
+    for record in shown:
+        lines.append("    %10.1f %16.1f  %-20s %s" % (
+            1000 * record.self_time,
+            1000 * record.cumulative,
+            record.provider,
+            record.module,
+        ))
+
+    return "\n".join(lines)
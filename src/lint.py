@@ -0,0 +1,220 @@
+import ast
+import hashlib
+import os
+import re
+
+from collections import namedtuple
+
+
+Diagnostic = namedtuple("Diagnostic", ["file", "line", "column", "code", "message"])
+
+IN_PROCESS_LINTERS = ("pyflakes", "pycodestyle")
+"""
+linters that LintEngine can run without starting a new process
+flake8 is not included because it also applies # noqa comments,
+project configuration, and plugins
+"""
+
+# flake8's codes for pyflakes messages
+PYFLAKES_CODES = {
+    "UnusedImport": "F401",
+    "ImportShadowedByLoopVar": "F402",
+    "ImportStarUsed": "F403",
+    "LateFutureImport": "F404",
+    "ImportStarUsage": "F405",
+    "ImportStarNotPermitted": "F406",
+    "FutureFeatureNotDefined": "F407",
+    "PercentFormatInvalidFormat": "F501",
+    "PercentFormatExpectedMapping": "F502",
+    "PercentFormatExpectedSequence": "F503",
+    "PercentFormatExtraNamedArguments": "F504",
+    "PercentFormatMissingArgument": "F505",
+    "PercentFormatMixedPositionalAndNamed": "F506",
+    "PercentFormatPositionalCountMismatch": "F507",
+    "PercentFormatStarRequiresSequence": "F508",
+    "PercentFormatUnsupportedFormatCharacter": "F509",
+    "StringDotFormatInvalidFormat": "F521",
+    "StringDotFormatExtraNamedArguments": "F522",
+    "StringDotFormatExtraPositionalArguments": "F523",
+    "StringDotFormatMissingArgument": "F524",
+    "StringDotFormatMixingAutomatic": "F525",
+    "FStringMissingPlaceholders": "F541",
+    "MultiValueRepeatedKeyLiteral": "F601",
+    "MultiValueRepeatedKeyVariable": "F602",
+    "TooManyExpressionsInStarredAssignment": "F621",
+    "TwoStarredExpressions": "F622",
+    "AssertTuple": "F631",
+    "IsLiteral": "F632",
+    "InvalidPrintSyntax": "F633",
+    "IfTuple": "F634",
+    "BreakOutsideLoop": "F701",
+    "ContinueOutsideLoop": "F702",
+    "YieldOutsideFunction": "F704",
+    "ReturnOutsideFunction": "F706",
+    "DefaultExceptNotLast": "F707",
+    "DoctestSyntaxError": "F721",
+    "ForwardAnnotationSyntaxError": "F722",
+    "RedefinedWhileUnused": "F811",
+    "UndefinedName": "F821",
+    "UndefinedExport": "F822",
+    "UndefinedLocal": "F823",
+    "DuplicateArgument": "F831",
+    "UnusedVariable": "F841",
+    "UnusedAnnotation": "F842",
+    "RaiseNotImplemented": "F901",
+}
+
+_OUTPUT_LINE = re.compile(r"^(?P<file>.+?):(?P<line>\d+):(?:(?P<column>\d+):)?\s*(?P<message>.*)$")
+_CODE = re.compile(r"^(?P<code>[A-Z]+\d+)\s+(?P<message>.*)$")
+
+
+def parse_output(text):
+    """
+    returns Diagnostics for the lines of linter output that look
+    like file:line:column: message
+    """
+    diagnostics = []
+    for line in text.splitlines():
+        match = _OUTPUT_LINE.match(line.strip())
+        if not match:
+            continue
+        message = match.group("message")
+        code = ""
+        code_match = _CODE.match(message)
+        if code_match:
+            code = code_match.group("code")
+            message = code_match.group("message")
+        diagnostics.append(Diagnostic(
+            match.group("file"),
+            int(match.group("line")),
+            int(match.group("column") or 0),
+            code,
+            message,
+        ))
+    return diagnostics
+
+
+class _CachedFile:
+    def __init__(self, stat_key, digest, lines):
+        self.stat_key = stat_key
+        self.digest = digest
+        self.lines = lines
+        self.tree = None
+        self.syntax_error = None
+        self.diagnostics = {}
+        "linter: [Diagnostic]"
+
+
+class LintEngine:
+    """
+    runs pyflakes and pycodestyle in this process
+    each file is parsed once - the AST and diagnostics are cached by
+    the hash of the file's contents, so only files that have changed
+    are checked again
+    """
+    def __init__(self):
+        self._files = {}
+
+    def clear(self):
+        self._files = {}
+
+    def check_files(self, paths, linter="pyflakes"):
+        """returns a list of Diagnostics for all of paths"""
+        diagnostics = []
+        for path in paths:
+            diagnostics.extend(self.check(path, linter))
+        return diagnostics
+
+    def check(self, path, linter="pyflakes"):
+        """
+        returns a list of Diagnostics for path, sorted by line and column
+        linter: one of IN_PROCESS_LINTERS
+        """
+        if linter not in IN_PROCESS_LINTERS:
+            raise ValueError("%s cannot be run in-process" % linter)
+        path = os.path.abspath(path)
+        cached = self._load(path)
+        if linter not in cached.diagnostics:
+            if linter == "pyflakes":
+                diagnostics = self._pyflakes(path, cached)
+            else:
+                diagnostics = self._pycodestyle(path, cached)
+            cached.diagnostics[linter] = sorted(
+                set(diagnostics), key=lambda d: (d.line, d.column, d.code)
+            )
+        return cached.diagnostics[linter]
+
+    def _load(self, path):
+        """returns the _CachedFile for path, reading it again if it changed"""
+        st = os.stat(path)
+        stat_key = (st.st_mtime_ns, st.st_size)
+        cached = self._files.get(path)
+        if cached is not None and cached.stat_key == stat_key:
+            return cached
+
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if cached is not None and cached.digest == digest:
+            cached.stat_key = stat_key
+            return cached
+
+        cached = _CachedFile(
+            stat_key, digest, data.decode("utf-8", "replace").splitlines(True)
+        )
+        try:
+            cached.tree = ast.parse(data, filename=path)
+        except (SyntaxError, ValueError) as e:
+            cached.syntax_error = e
+        self._files[path] = cached
+        return cached
+
+    @staticmethod
+    def _pyflakes(path, cached):
+        if cached.syntax_error is not None:
+            e = cached.syntax_error
+            return [Diagnostic(
+                path,
+                getattr(e, "lineno", None) or 1,
+                getattr(e, "offset", None) or 0,
+                "E999",
+                "%s: %s" % (type(e).__name__, getattr(e, "msg", str(e))),
+            )]
+
+        from pyflakes.checker import Checker
+
+        checker = Checker(cached.tree, filename=path)
+        return [
+            Diagnostic(
+                path,
+                msg.lineno,
+                msg.col + 1,
+                PYFLAKES_CODES.get(type(msg).__name__, "F"),
+                msg.message % msg.message_args,
+            ) for msg in checker.messages
+        ]
+
+    @staticmethod
+    def _pycodestyle(path, cached):
+        import pycodestyle
+
+        class CollectingReport(pycodestyle.BaseReport):
+            def __init__(self, options):
+                super().__init__(options)
+                self.diagnostics = []
+
+            def error(self, line_number, offset, text, check):
+                code = super().error(line_number, offset, text, check)
+                if code:
+                    self.diagnostics.append(
+                        Diagnostic(path, line_number, offset + 1, code, text[5:])
+                    )
+                return code
+
+        style = pycodestyle.StyleGuide(quiet=True)
+        report = CollectingReport(style.options)
+        checker = pycodestyle.Checker(
+            path, lines=cached.lines, options=style.options, report=report
+        )
+        checker.check_all()
+        return report.diagnostics
@@ -0,0 +1,130 @@
+from collections import deque
+
+from chimerax.core.logger import PlainTextLog
+
+
+CAPTURE_MESSAGES = 200
+"number of log messages kept for each test"
+
+
+class LogCapture(PlainTextLog):
+    """
+    log that keeps messages in memory instead of showing them
+    the last max_messages messages of each test are kept until
+    they are taken with pop
+    messages logged outside of a test (e.g. in setUpClass) are
+    kept under None
+
+    with LogCapture(session.logger):
+        ...
+    """
+    excludes_other_logs = True
+
+    def __init__(self, logger, max_messages=CAPTURE_MESSAGES):
+        super().__init__()
+        self.logger = logger
+        self.max_messages = max_messages
+        self.current_test = None
+        self.num_messages = 0
+        self._buffers = {}
+
+    def __enter__(self):
+        self.logger.add_log(self)
+        return self
+
+    def __exit__(self, *args):
+        self.logger.remove_log(self)
+
+    def log(self, level, msg):
+        levels = {
+            self.LEVEL_WARNING: "WARNING",
+            self.LEVEL_ERROR: "ERROR",
+            self.LEVEL_BUG: "BUG",
+        }
+        msg = msg.rstrip("\n")
+        if level in levels:
+            msg = "%s: %s" % (levels[level], msg)
+        try:
+            buffer = self._buffers[self.current_test]
+        except KeyError:
+            buffer = self._buffers[self.current_test] = deque(maxlen=self.max_messages)
+        buffer.append(msg)
+        self.num_messages += 1
+        return True
+
+    def start_test(self, test_id):
+        self.current_test = test_id
+
+    def stop_test(self):
+        self.current_test = None
+
+    def pop(self, test_id):
+        """returns the messages captured for test_id and forgets them"""
+        buffer = self._buffers.pop(test_id, None)
+        if not buffer:
+            return ""
+        return "\n".join(buffer)
+
+
+def captured_result(resultclass, capture):
+    """
+    returns a subclass of resultclass (a TestManagerResult) that adds
+    the messages captured while a test ran to its outcome if the test
+    failed or had an error
+    """
+    def with_log(msg, text):
+        return "%s\ncaptured log:\n%s" % (msg, text)
+
+    class CapturedResult(resultclass):
+        def startTest(self, test):
+            # messages from between tests are only kept for class errors
+            capture.pop(None)
+            capture.start_test(test.id())
+            super().startTest(test)
+
+        def stopTest(self, test):
+            super().stopTest(test)
+            capture.stop_test()
+            text = capture.pop(test.id())
+            status, msg = self.outcomes.get(test.id(), (None, None))
+            if status in ["fail", "error"] and text:
+                self.outcomes[test.id()] = (status, with_log(msg, text))
+
+        def addError(self, test, err):
+            num_class_errors = len(self.class_errors)
+            super().addError(test, err)
+            if len(self.class_errors) > num_class_errors:
+                text = capture.pop(None)
+                if text:
+                    holder, msg = self.class_errors[-1]
+                    self.class_errors[-1] = (holder, with_log(msg, text))
+
+    return CapturedResult
+
+
+def summary_html(results_by_name, run_time):
+    """
+    compact HTML summary of a test run, with the message of each test
+    that failed or had an error in a collapsed section
+    results_by_name: {provider: {test case: (status, message)}}
+    """
+    from html import escape
+
+    counts = {}
+    failed = []
+    for results in results_by_name.values():
+        for case, (status, msg) in results.items():
+            counts[status] = counts.get(status, 0) + 1
+            if status in ["fail", "error"]:
+                failed.append((case.id(), status, msg))
+
+    lines = ["<pre>Ran %i tests in %.3fs: %s</pre>" % (
+        sum(counts.values()),
+        run_time,
+        ", ".join("%i %s" % (n, status) for status, n in sorted(counts.items())),
+    )]
+    for test_id, status, msg in sorted(failed):
+        lines.append("<details><summary>%s: %s</summary><pre>%s</pre></details>" % (
+            status.upper(), escape(test_id), escape(str(msg))
+        ))
+    return "\n".join(lines)
@@ -1,3 +1,5 @@
+import os
+
 from inspect import signature
 
 from warnings import warn
@@ -10,6 +12,9 @@ class TestManager(ProviderManager):
     def __init__(self, session, name):
         self._session = session
         self.tests = {}
+        self._history = None
+        self._tool_index = None
+        self._lint_engine = None
         args = []
         params = signature(super().__init__).parameters
         if any("name" in param for param in params):
@@ -18,3 +23,30 @@ class TestManager(ProviderManager):
 
     def add_provider(self, bundle_info, name):
         self.tests[name] = bundle_info
+
+    @property
+    def history(self):
+        """ResultsHistory with the outcomes of previous test runs"""
+        if self._history is None:
+            from chimerax import app_dirs
+            from TestManager.history import ResultsHistory
+            self._history = ResultsHistory(
+                os.path.join(app_dirs.user_data_dir, "TestManager", "results.sqlite")
+            )
+        return self._history
+
+    @property
+    def tool_index(self):
+        """ToolIndex for finding running tools"""
+        if self._tool_index is None:
+            from TestManager.tool_index import ToolIndex
+            self._tool_index = ToolIndex(self._session)
+        return self._tool_index
+
+    @property
+    def lint_engine(self):
+        """LintEngine that caches diagnostics for the linter command"""
+        if self._lint_engine is None:
+            from TestManager.lint import LintEngine
+            self._lint_engine = LintEngine()
+        return self._lint_engine
@@ -0,0 +1,226 @@
+import csv
+import json
+import os
+import sys
+
+from functools import partial, update_wrapper
+from itertools import islice
+from unittest import TestSuite
+from unittest.util import strclass
+
+
+def parametrize(source, ids=None):
+    """
+    decorator to run a test method once for each parameter in source
+    each parameter is reported (and can be selected) as its own test,
+    named like test_method[id]
+    source: one of
+        a function (e.g. a generator function) that returns the parameters
+        a list or other iterable that can be iterated more than once
+        path to a .csv or .json manifest, relative to the test's module
+            csv rows are passed as keyword arguments (values are strings)
+            json files must contain a list
+    parameters that are dicts are passed as keyword arguments, lists and
+    tuples as positional arguments, and anything else as one argument
+    ids: name of a key in each parameter or function(parameter) that
+        returns the name of the case
+        by default, an "id" key is used if parameters have one (it is not
+        passed to the test method), otherwise the parameter's index
+    test cases are only created right before they run, so the
+    parameters should be small (e.g. file names rather than structures)
+
+    @parametrize("cases.csv")
+    def test_open(self, path, num_atoms):
+        ...
+    """
+    def decorator(func):
+        func._testmanager_params = ParamSource(source, ids, func.__module__)
+        return func
+
+    return decorator
+
+
+def read_manifest(path):
+    """yields the parameters in a .csv or .json manifest"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    elif ext == ".json":
+        with open(path, encoding="utf-8") as f:
+            params = json.load(f)
+        if not isinstance(params, list):
+            raise ValueError("%s must contain a list of parameters" % path)
+        yield from params
+    else:
+        raise ValueError("unknown manifest format: %s" % path)
+
+
+class ParamSource:
+    """parameters of a parametrized test method"""
+    def __init__(self, source, ids=None, module=None):
+        if (
+            not callable(source) and
+            not isinstance(source, str) and
+            iter(source) is source
+        ):
+            raise TypeError(
+                "parameters must be re-iterable - "
+                "pass the generator function instead of a generator"
+            )
+        self.source = source
+        self.ids = ids
+        self.module = module
+        self._cursor = None
+
+    def path(self):
+        """path to the manifest file"""
+        if os.path.isabs(self.source) or self.module not in sys.modules:
+            return self.source
+        module_dir = os.path.dirname(sys.modules[self.module].__file__)
+        return os.path.join(module_dir, self.source)
+
+    def __iter__(self):
+        if isinstance(self.source, str):
+            return read_manifest(self.path())
+        if callable(self.source):
+            return iter(self.source())
+        return iter(self.source)
+
+    def param_id(self, param, index):
+        if callable(self.ids):
+            return str(self.ids(param))
+        if self.ids is not None:
+            return str(param[self.ids])
+        if isinstance(param, dict) and "id" in param:
+            return str(param["id"])
+        return str(index)
+
+    def get(self, index):
+        """
+        returns the parameter at index
+        reading parameters in increasing order only iterates
+        over the source once
+        """
+        if self._cursor is None or index < self._cursor[0]:
+            self._cursor = (0, iter(self))
+        position, it = self._cursor
+        try:
+            param = next(islice(it, index - position, None))
+        except StopIteration:
+            self._cursor = None
+            raise IndexError("no parameter %i" % index)
+        self._cursor = (index + 1, it)
+        return param
+
+
+class CaseRef:
+    """
+    a case of a parametrized test that has not been created yet
+    make_case creates the test case
+    """
+    __slots__ = ("test_class", "method", "index", "name")
+
+    def __init__(self, test_class, method, index, name):
+        self.test_class = test_class
+        self.method = method
+        self.index = index
+        self.name = name
+        "name of the case, test_method[id]"
+
+    def id(self):
+        return "%s.%s" % (strclass(self.test_class), self.name)
+
+    def countTestCases(self):
+        return 1
+
+    def __repr__(self):
+        return "<%s %s>" % (type(self).__name__, self.id())
+
+
+def param_refs(cls, method):
+    """yields a CaseRef for each parameter of cls.method"""
+    source = getattr(cls, method)._testmanager_params
+    seen = set()
+    for i, param in enumerate(source):
+        name = "%s[%s]" % (method, source.param_id(param, i))
+        if name in seen:
+            raise ValueError("duplicate test case %s.%s" % (cls.__qualname__, name))
+        seen.add(name)
+        yield CaseRef(cls, method, i, name)
+
+
+def is_parametrized(func):
+    return hasattr(func, "_testmanager_params")
+
+
+def make_case(case):
+    """
+    returns a new test case for a test case or CaseRef
+    """
+    ref = getattr(case, "_param_ref", case)
+    if not isinstance(ref, CaseRef):
+        return type(case)(case._testMethodName)
+
+    source = getattr(ref.test_class, ref.method)._testmanager_params
+    param = source.get(ref.index)
+    args = ()
+    kwargs = {}
+    if isinstance(param, dict):
+        kwargs = dict(param)
+        if source.ids is None:
+            kwargs.pop("id", None)
+    elif isinstance(param, (list, tuple)):
+        args = param
+    else:
+        args = (param,)
+
+    new_case = ref.test_class(ref.method)
+    method = getattr(new_case, ref.method)
+    setattr(
+        new_case, ref.name, update_wrapper(partial(method, *args, **kwargs), method)
+    )
+    new_case._testMethodName = ref.name
+    new_case._param_ref = ref
+    return new_case
+
+
+def case_class(case):
+    """test case class of a test case or CaseRef"""
+    if isinstance(case, CaseRef):
+        return case.test_class
+    return type(case)
+
+
+def case_label(case):
+    """Class.test_method name of a test case or CaseRef"""
+    if isinstance(case, CaseRef):
+        return "%s.%s" % (case.test_class.__qualname__, case.name)
+    return "%s.%s" % (type(case).__qualname__, case._testMethodName)
+
+
+class LazySuite(TestSuite):
+    """
+    test suite that can hold CaseRefs
+    the test case for each CaseRef is created when the suite is run,
+    and is released after it runs
+    """
+    def addTest(self, test):
+        if isinstance(test, CaseRef):
+            self._tests.append(test)
+            return
+        super().addTest(test)
+
+    def countTestCases(self):
+        return sum(test.countTestCases() for test in self.items())
+
+    def items(self):
+        """the tests and CaseRefs in the suite, without creating any cases"""
+        return [test for test in self._tests if test is not None]
+
+    def __iter__(self):
+        for test in self._tests:
+            if isinstance(test, CaseRef):
+                yield make_case(test)
+            else:
+                yield test
@@ -0,0 +1,108 @@
+import time
+
+from unittest import TextTestResult
+
+
+class TestManagerResult(TextTestResult):
+    """
+    TextTestResult that also keeps track of the outcome and
+    duration of each test, keyed by the test's id
+    outcomes are (status, message) tuples, where status is one of
+    "success", "fail", "error", "expected_failure",
+    "unexpected_success", or "skip"
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.outcomes = {}
+        "test id: (status, message)"
+        self.durations = {}
+        "test id: time in seconds, including setUp and tearDown"
+        self.class_errors = []
+        "messages from errors that happened outside of a test (e.g. setUpClass)"
+        self._start_times = {}
+
+    def startTest(self, test):
+        self._start_times[test.id()] = time.perf_counter()
+        super().startTest(test)
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        start = self._start_times.pop(test.id(), None)
+        if start is not None:
+            self.durations[test.id()] = time.perf_counter() - start
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self.outcomes[test.id()] = ("success", "success!")
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self.outcomes[test.id()] = ("fail", self.failures[-1][1])
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        if test.id() not in self._start_times:
+            # error holder for setUpClass, tearDownClass, etc.
+            self.class_errors.append((test.id(), self.errors[-1][1]))
+            return
+        self.outcomes[test.id()] = ("error", self.errors[-1][1])
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        if err is None:
+            return
+        if issubclass(err[0], test.failureException):
+            self.outcomes[test.id()] = ("fail", self.failures[-1][1])
+        else:
+            self.outcomes[test.id()] = ("error", self.errors[-1][1])
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self.outcomes[test.id()] = (
+            "expected_failure", self.expectedFailures[-1][1]
+        )
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self.outcomes[test.id()] = (
+            "unexpected_success", "I didn't expect to get this far..."
+        )
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self.outcomes[test.id()] = ("skip", reason)
+
+    def outcome(self, case):
+        """
+        returns (status, message) for case
+        tests that never ran (e.g. because setUpClass raised an
+        error) are reported as errors
+        """
+        from TestManager.params import case_class
+
+        try:
+            return self.outcomes[case.id()]
+        except KeyError:
+            pass
+        cls = case_class(case)
+        # class errors are reported with ids like "setUpClass (module.Class)"
+        holder = "(%s.%s)" % (cls.__module__, cls.__qualname__)
+        msgs = [msg for name, msg in self.class_errors if holder in name]
+        if msgs:
+            return ("error", "\n".join(msgs))
+        return ("error", "test did not run")
+
+
+def results_by_provider(result, cases_by_name):
+    """
+    organize the outcomes in result by provider name
+    cases_by_name: {provider name: [test case or CaseRef]}
+    returns {provider name: {test case: (status, message)}}
+    """
+    results_by_name = {}
+    for name, cases in cases_by_name.items():
+        results_by_name[name] = {}
+        for case in cases:
+            results_by_name[name][case] = result.outcome(case)
+
+    return results_by_name
@@ -0,0 +1,52 @@
+import heapq
+import json
+import zlib
+
+
+def stable_hash(test_id):
+    """hash of a test id that is the same in every process"""
+    return zlib.crc32(test_id.encode("utf-8"))
+
+
+def partition(test_ids, num_shards, durations=None):
+    """
+    split test_ids into num_shards lists
+    the result only depends on the arguments, so every process that
+    is given the same tests and durations gets the same partition
+    durations: {test id: seconds}
+        if any of test_ids have a duration, tests are assigned
+        longest first to the shard with the least total time
+        (tests without a duration are assumed to take the median time)
+        otherwise, tests are assigned by stable_hash
+    """
+    shards = [[] for i in range(0, num_shards)]
+    durations = durations or {}
+    known = sorted(durations[test] for test in test_ids if test in durations)
+    if not known:
+        for test in test_ids:
+            shards[stable_hash(test) % num_shards].append(test)
+        return shards
+
+    default = known[len(known) // 2]
+    ordered = sorted(
+        test_ids, key=lambda test: (-durations.get(test, default), test)
+    )
+    loads = [(0., i) for i in range(0, num_shards)]
+    for test in ordered:
+        load, i = heapq.heappop(loads)
+        shards[i].append(test)
+        heapq.heappush(loads, (load + durations.get(test, default), i))
+
+    return shards
+
+
+def load_timings(filename):
+    """returns {test id: seconds} from a JSON timings file"""
+    with open(filename, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_timings(filename, durations):
+    """save {test id: seconds} to a JSON timings file"""
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(durations, f, indent=1, sort_keys=True)
@@ -0,0 +1,86 @@
+import time
+
+from chimerax.core.tools import ADD_TOOL_INSTANCE, REMOVE_TOOL_INSTANCE
+
+
+class ToolIndex:
+    """
+    keeps track of running tools by name and by class
+    the index is updated by the tool instance added/deleted triggers,
+    so looking up a tool doesn't require scanning session.tools.list()
+    """
+    def __init__(self, session):
+        self.session = session
+        self._by_name = {}
+        self._by_class = {}
+        for tool in session.tools.list():
+            self._add(tool)
+        self._handlers = [
+            session.triggers.add_handler(ADD_TOOL_INSTANCE, self._tools_added),
+            session.triggers.add_handler(REMOVE_TOOL_INSTANCE, self._tools_removed),
+        ]
+
+    def delete(self):
+        """stop tracking tools"""
+        for handler in self._handlers:
+            self.session.triggers.remove_handler(handler)
+        self._handlers = []
+        self._by_name = {}
+        self._by_class = {}
+
+    def _add(self, tool):
+        self._by_name.setdefault(tool.tool_name, []).append(tool)
+        for cls in type(tool).__mro__:
+            self._by_class.setdefault(cls, []).append(tool)
+
+    def _remove(self, tool):
+        try:
+            self._by_name[tool.tool_name].remove(tool)
+        except (KeyError, ValueError):
+            pass
+        for cls in type(tool).__mro__:
+            try:
+                self._by_class[cls].remove(tool)
+            except (KeyError, ValueError):
+                pass
+
+    def _tools_added(self, trigger_name, tools):
+        for tool in tools:
+            self._add(tool)
+
+    def _tools_removed(self, trigger_name, tools):
+        for tool in tools:
+            self._remove(tool)
+
+    def find(self, name=None, tool_cls=None):
+        """
+        returns the most recently started tool with the given class
+        (if tool_cls is not None) or name
+        returns None if there is no such tool
+        """
+        if tool_cls is not None:
+            tools = self._by_class.get(tool_cls)
+        else:
+            tools = self._by_name.get(name)
+        if tools:
+            return tools[-1]
+        return None
+
+    def wait_for(self, name=None, tool_cls=None, timeout=5):
+        """
+        like find, but if the tool hasn't registered yet, process
+        events until it does or timeout (seconds) has passed
+        returns None if the tool did not start in time
+        """
+        tool = self.find(name, tool_cls)
+        if tool is not None or not self.session.ui.is_gui:
+            return tool
+
+        deadline = time.monotonic() + timeout
+        while tool is None and time.monotonic() < deadline:
+            self.session.ui.processEvents()
+            tool = self.find(name, tool_cls)
+            if tool is None:
+                time.sleep(0.01)
+
+        return tool
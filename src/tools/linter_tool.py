@@ -6,9 +6,16 @@ from chimerax.core.tools import ToolInstance
 from chimerax.core.commands import run
 
 try:
-    from Qt.QtCore import Qt
+    from Qt.QtCore import (
+        QAbstractTableModel,
+        QModelIndex,
+        QSortFilterProxyModel,
+        Qt,
+    )
     from Qt.QtGui import QIcon
     from Qt.QtWidgets import (
+        QAbstractItemView,
+        QTableView,
         QPushButton,
         QComboBox,
         QTableWidget,
@@ -22,9 +29,16 @@ try:
         QFileDialog,
     )
 except (ModuleNotFoundError, ImportError):
-    from PyQt5.QtCore import Qt
+    from PyQt5.QtCore import (
+        QAbstractTableModel,
+        QModelIndex,
+        QSortFilterProxyModel,
+        Qt,
+    )
     from PyQt5.QtGui import QIcon
     from PyQt5.QtWidgets import (
+        QAbstractItemView,
+        QTableView,
         QPushButton,
         QComboBox,
         QTableWidget,
@@ -46,12 +60,52 @@ class _LinterSettings(Settings):
     }
 
 
+class DiagnosticsModel(QAbstractTableModel):
+    """table of TestManager.lint.Diagnostics"""
+    COLUMNS = ["file", "line", "column", "code", "message"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._diagnostics = []
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._diagnostics)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        diagnostic = self._diagnostics[index.row()]
+        if role == Qt.DisplayRole:
+            # line and column are ints so they sort numerically
+            return diagnostic[index.column()]
+        if role == Qt.ToolTipRole:
+            return diagnostic.file if index.column() == 0 else diagnostic.message
+        return None
+
+    def set_diagnostics(self, diagnostics):
+        self.beginResetModel()
+        self._diagnostics = list(diagnostics)
+        self.endResetModel()
+
+
 class Linter(ToolInstance):
     """
     tool to run python linters on files
     the UI has a list of files, an option to choose
     the linter, and a button to run the linter
-    results are printed to the log
+    results are printed to the log and shown in a sortable table
     """
 
     def __init__(self, session, name):
@@ -76,7 +130,7 @@ class Linter(ToolInstance):
 
         self.linters = QComboBox()
         self.linters.addItems([
-            "pyflakes", "flake8", "mypy", "pydocstyle",
+            "pyflakes", "pycodestyle", "flake8", "mypy", "pydocstyle",
             "pylint", 
         ])
         ndx = self.linters.findText(self.settings.linter, Qt.MatchExactly)
@@ -87,6 +141,18 @@ class Linter(ToolInstance):
         lint.clicked.connect(self.run_linter)
         layout.addRow(lint)
 
+        self.diagnostics_model = DiagnosticsModel()
+        proxy_model = QSortFilterProxyModel()
+        proxy_model.setSourceModel(self.diagnostics_model)
+        self.results = QTableView()
+        self.results.setModel(proxy_model)
+        self.results.setSortingEnabled(True)
+        self.results.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.results.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.results.horizontalHeader().setStretchLastSection(True)
+        self.results.verticalHeader().setVisible(False)
+        layout.addRow(self.results)
+
         self.add_files(loads(self.settings.files))
 
         self.tool_window.ui_area.setLayout(layout)
@@ -149,10 +215,16 @@ class Linter(ToolInstance):
         previous_files = []
         linter = self.linters.currentText()
         for row in range(0, self.table.rowCount() - 1):
-            fname = self.table.item(row, 0).text()
-            previous_files.append(fname)
+            previous_files.append(self.table.item(row, 0).text())
+
+        diagnostics = []
+        if previous_files:
+            # one command for all files, so subprocess linters only start once
+            diagnostics = run(self.session, "linter %s linter %s" % (
+                " ".join("\"%s\"" % fname for fname in previous_files), linter
+            )) or []
 
-            run(self.session, "linter \"%s\" linter %s" % (fname, linter))
+        self.diagnostics_model.set_diagnostics(diagnostics)
 
         self.settings.files = dumps(previous_files)
         self.settings.linter = linter
@@ -1,36 +1,62 @@
 try:
-    from Qt.QtCore import QRegularExpression, Qt
+    from Qt.QtCore import (
+        QAbstractTableModel,
+        QEvent,
+        QModelIndex,
+        QRect,
+        QRegularExpression,
+        QSortFilterProxyModel,
+        Qt,
+    )
     from Qt.QtGui import QFontDatabase
     from Qt.QtWidgets import (
         QVBoxLayout,
         QFormLayout,
-        QHBoxLayout,
-        QTableWidget,
-        QTableWidgetItem,
+        QTableView,
+        QHeaderView,
+        QAbstractItemView,
+        QStyledItemDelegate,
+        QStyleOptionViewItem,
+        QApplication,
         QPushButton,
         QLineEdit,
         QStyle,
         QSizePolicy,
-        QWidget,
         QTextBrowser,
         QCheckBox,
+        QToolTip,
+        QComboBox,
+        QTabWidget,
     )
 except (ModuleNotFoundError, ImportError):
-    from PyQt5.QtCore import QRegularExpression, Qt
+    from PyQt5.QtCore import (
+        QAbstractTableModel,
+        QEvent,
+        QModelIndex,
+        QRect,
+        QRegularExpression,
+        QSortFilterProxyModel,
+        Qt,
+    )
     from PyQt5.QtGui import QFontDatabase
     from PyQt5.QtWidgets import (
         QVBoxLayout,
         QFormLayout,
-        QHBoxLayout,
-        QTableWidget,
-        QTableWidgetItem,
+        QTableView,
+        QHeaderView,
+        QAbstractItemView,
+        QStyledItemDelegate,
+        QStyleOptionViewItem,
+        QApplication,
         QPushButton,
         QLineEdit,
         QStyle,
         QSizePolicy,
-        QWidget,
         QTextBrowser,
         QCheckBox,
+        QToolTip,
+        QComboBox,
+        QTabWidget,
     )
 
 from chimerax.core.settings import Settings
@@ -38,30 +64,240 @@ from chimerax.core.tools import ToolInstance
 from chimerax.ui.gui import MainToolWindow, ChildToolWindow
 
 
-def get_button(button_type):
-    button = QPushButton()
-    button.setFlat(True)
-    if button_type == "success":
-        button.setIcon(button.style().standardIcon(QStyle.SP_DialogApplyButton))
-    elif button_type == "fail":
-        button.setIcon(button.style().standardIcon(QStyle.SP_MessageBoxCritical))
-    elif button_type == "error":
-        button.setIcon(button.style().standardIcon(QStyle.SP_MessageBoxWarning))
-    elif button_type == "skip" or button_type == "expected fail":
-        button.setIcon(button.style().standardIcon(QStyle.SP_MessageBoxInformation))
-    elif button_type == "unexpected success":
-        button.setIcon(button.style().standardIcon(QStyle.SP_MessageBoxQuestion))
+# status: (icon, tooltip/window header, child window title, line format)
+# line format is filled in with the test's name and message
+RESULT_TYPES = {
+    "success": (
+        QStyle.SP_DialogApplyButton, "Successes:", "successes for %s", "%s: %s",
+    ),
+    "fail": (
+        QStyle.SP_MessageBoxCritical, "Failed tests:", "failures for %s", "%s failed: %s",
+    ),
+    "error": (
+        QStyle.SP_MessageBoxWarning, "Errors during test:", "errors for %s", "error during %s: %s",
+    ),
+    "unexpected_success": (
+        QStyle.SP_MessageBoxQuestion,
+        "Unexpected successes:",
+        "unexpected successes for %s",
+        "%s should not have worked, but did",
+    ),
+    "expected_failure": (
+        QStyle.SP_MessageBoxInformation,
+        "Expected fails:",
+        "expected failures for %s",
+        "intended failure during %s: %s",
+    ),
+    "skip": (
+        QStyle.SP_MessageBoxInformation, "Skipped tests:", "skipped tests for %s", "%s",
+    ),
+    "quarantined": (
+        QStyle.SP_BrowserStop,
+        "Quarantined tests:",
+        "quarantined tests for %s",
+        "%s failed, but is quarantined: %s",
+    ),
+}
+
+RESULT_COUNTS_ROLE = Qt.UserRole + 1
+"data role for a list of (status, count) for a provider"
+
+MAX_TOOLTIP_LINES = 30
+
+
+class ResultsModel(QAbstractTableModel):
+    """
+    table of test providers (column 0) and the results of the
+    last time their tests were run (column 1)
+    text for the results is only generated when it is requested
+    """
+    def __init__(self, names, parent=None):
+        super().__init__(parent)
+        self._names = list(names)
+        self._rows = {name: i for i, name in enumerate(self._names)}
+        self._results = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._names)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return 2
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return ["test", "result"][section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self._names[index.row()]
+        if index.column() == 0:
+            if role == Qt.DisplayRole:
+                return name
+            return None
+
+        if role == RESULT_COUNTS_ROLE:
+            return self.counts(name)
+        if role == Qt.ToolTipRole:
+            return "\n\n".join(
+                self.status_text(name, status, max_lines=MAX_TOOLTIP_LINES)
+                for status, count in self.counts(name)
+            ) or None
+        return None
+
+    def name(self, row):
+        """provider name for the given row of the source model"""
+        return self._names[row]
 
-    return button
+    def counts(self, name):
+        """returns [(status, count)] for the last results of the named provider"""
+        results = self._results.get(name, {})
+        return [
+            (status, len(results[status])) for status in RESULT_TYPES
+            if results.get(status)
+        ]
+
+    def status_text(self, name, status, max_lines=None):
+        """
+        text listing the tests of the named provider that had the
+        given status
+        if max_lines is given, the list is truncated to that many tests
+        """
+        header, line_fmt = RESULT_TYPES[status][1], RESULT_TYPES[status][3]
+        tests = self._results.get(name, {}).get(status, [])
+        shown = tests if max_lines is None else tests[:max_lines]
+        lines = [header]
+        for label, msg in shown:
+            if line_fmt.count("%s") == 2:
+                lines.append(line_fmt % (label, msg))
+            else:
+                lines.append(line_fmt % label)
+        if len(shown) < len(tests):
+            lines.append("... and %i more" % (len(tests) - len(shown)))
+        return "\n".join(lines).strip()
+
+    def set_results(self, results_by_name):
+        """
+        store the results from the test command
+        results_by_name: {provider: {test case: (status, message)}}
+            test ids can be used instead of test cases (e.g. results
+            from ResultsHistory.run_results)
+        """
+        from TestManager.params import case_label
+
+        for name, results in results_by_name.items():
+            by_status = {}
+            for case, (status, msg) in results.items():
+                label = case if isinstance(case, str) else case_label(case)
+                by_status.setdefault(status, []).append((label, msg))
+            self._results[name] = by_status
+            try:
+                row = self._rows[name]
+            except KeyError:
+                continue
+            ndx = self.index(row, 1)
+            self.dataChanged.emit(ndx, ndx)
+
+
+class ResultsDelegate(QStyledItemDelegate):
+    """
+    draws an icon and a count for each type of result
+    clicking on an icon calls on_click with the provider name and status
+    """
+    def __init__(self, results_model, on_click, parent=None):
+        super().__init__(parent)
+        self.results_model = results_model
+        self.on_click = on_click
+        self._icons = {}
+
+    def _icon(self, status):
+        if status not in self._icons:
+            self._icons[status] = QApplication.style().standardIcon(
+                RESULT_TYPES[status][0]
+            )
+        return self._icons[status]
+
+    @staticmethod
+    def _segments(rect, counts):
+        if not counts:
+            return []
+        width = rect.width() / len(counts)
+        segments = []
+        for i, (status, count) in enumerate(counts):
+            segments.append((
+                status,
+                count,
+                QRect(
+                    rect.left() + int(i * width), rect.top(),
+                    int(width), rect.height(),
+                ),
+            ))
+        return segments
+
+    def _status_at(self, pos, option, index):
+        counts = index.data(RESULT_COUNTS_ROLE)
+        for status, count, rect in self._segments(option.rect, counts):
+            if rect.contains(pos):
+                return status
+        return None
+
+    def paint(self, painter, option, index):
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        style = opt.widget.style() if opt.widget else QApplication.style()
+        style.drawPrimitive(QStyle.PE_PanelItemViewItem, opt, painter, opt.widget)
+
+        counts = index.data(RESULT_COUNTS_ROLE)
+        dim = opt.decorationSize.height()
+        painter.save()
+        for status, count, rect in self._segments(opt.rect, counts):
+            icon_rect = QRect(
+                rect.left() + 2, rect.top() + (rect.height() - dim) // 2, dim, dim
+            )
+            self._icon(status).paint(painter, icon_rect)
+            text_rect = rect.adjusted(dim + 6, 0, 0, 0)
+            painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignVCenter, "%i" % count)
+        painter.restore()
+
+    def helpEvent(self, event, view, option, index):
+        if event.type() == QEvent.ToolTip:
+            status = self._status_at(event.pos(), option, index)
+            if status is not None:
+                name = index.sibling(index.row(), 0).data()
+                QToolTip.showText(
+                    event.globalPos(),
+                    self.results_model.status_text(
+                        name, status, max_lines=MAX_TOOLTIP_LINES
+                    ),
+                    view,
+                )
+                return True
+        return super().helpEvent(event, view, option, index)
+
+    def editorEvent(self, event, model, option, index):
+        if (
+            event.type() == QEvent.MouseButtonRelease and
+            event.button() == Qt.LeftButton
+        ):
+            status = self._status_at(event.pos(), option, index)
+            if status is not None:
+                self.on_click(index.sibling(index.row(), 0).data(), status)
+                return True
+        return super().editorEvent(event, model, option, index)
 
 
 class TestRunner(ToolInstance):
     def __init__(self, session, name):
         super().__init__(session, name)
         self.tool_window = MainToolWindow(self)
-        
+
         self._build_ui()
-    
+
     def _build_ui(self):
         """
         ui should have:
@@ -70,24 +306,32 @@ class TestRunner(ToolInstance):
             * button to run tests
         """
         layout = QFormLayout()
-        
+
         # table to list test classes and the results
-        self.table = QTableWidget()
-        self.table.setColumnCount(2)
-        self.table.setHorizontalHeaderLabels(["test", "result"])
-        self.table.horizontalHeader().setSectionResizeMode(0, self.table.horizontalHeader().Interactive)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.table.horizontalHeader().setSectionResizeMode(1, self.table.horizontalHeader().Stretch)
+        self.results_model = ResultsModel(self.session.test_manager.tests.keys())
+        self.proxy_model = QSortFilterProxyModel()
+        self.proxy_model.setSourceModel(self.results_model)
+        self.proxy_model.setFilterKeyColumn(0)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy_model)
+        self.table.setItemDelegateForColumn(
+            1, ResultsDelegate(self.results_model, self.show_results, self.table)
+        )
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Interactive)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.setSizePolicy(QSizePolicy.MinimumExpanding, QSizePolicy.MinimumExpanding)
-        self.table.setSelectionBehavior(self.table.SelectRows)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
         layout.addRow(self.table)
-        
+
         self.filter = QLineEdit()
         self.filter.setPlaceholderText("filter test names")
         self.filter.setClearButtonEnabled(True)
         self.filter.textChanged.connect(self.apply_filter)
         layout.addRow(self.filter)
-        
+
         self.profile = QCheckBox()
         self.profile.setToolTip(
             "profile functions called during testing "
@@ -102,238 +346,81 @@ class TestRunner(ToolInstance):
             "otherwise, run selected tests"
         )
         layout.addRow(self.run_button)
-        
-        self.fill_table()
+
+        history_button = QPushButton("history")
+        history_button.clicked.connect(self.show_history)
+        history_button.setToolTip("compare the results of previous runs")
+        layout.addRow(history_button)
+
+        self.load_latest_results()
         self.table.resizeColumnToContents(0)
-        
+
         self.tool_window.ui_area.setLayout(layout)
 
         self.tool_window.manage(None)
 
+    def load_latest_results(self):
+        """
+        show the most recent results of each provider from the results history
+        """
+        results = self.session.test_manager.history.latest_results()
+        if results:
+            self.results_model.set_results(results)
+
+    def show_history(self):
+        """open a window to compare previous runs"""
+        self.tool_window.create_child_window(
+            "test history", window_class=HistoryWindow
+        )
+
     def apply_filter(self, text=None):
         """filter table to only show tests matching text"""
         if text is None:
             text = self.filter.text()
 
-        if text:
-            text = text.replace("(", "\(")
-            text = text.replace(")", "\)")
-            m = QRegularExpression(text)
-            m.setPatternOptions(QRegularExpression.CaseInsensitiveOption)
-            if m.isValid():
-                m.optimize()
-                filter = lambda row_num: m.match(self.table.item(row_num, 0).text()).hasMatch()
-            else:
-                return
-
-        else:
-            filter = lambda row: True
-            
-        for i in range(0, self.table.rowCount()):
-            self.table.setRowHidden(i, not filter(i))
-    
-    def fill_table(self):
-        """adds test names to the table"""
-        mgr = self.session.test_manager
-        
-        for name in mgr.tests.keys():
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            test_name = QTableWidgetItem()
-            test_name.setData(Qt.DisplayRole, name)
-            self.table.setItem(row, 0, test_name)
-    
+        text = text.replace("(", "\\(")
+        text = text.replace(")", "\\)")
+        m = QRegularExpression(text)
+        m.setPatternOptions(QRegularExpression.CaseInsensitiveOption)
+        if not m.isValid():
+            return
+
+        m.optimize()
+        self.proxy_model.setFilterRegularExpression(m)
+
+    def show_results(self, name, status):
+        """open a window with the tests of the named provider that had status"""
+        self.tool_window.create_child_window(
+            RESULT_TYPES[status][2] % name,
+            text=self.results_model.status_text(name, status),
+            window_class=ResultsWindow,
+        )
+
     def run_tests(self):
         """run the tests selected on the table and show the results"""
         from TestManager.commands.test import test
-        
+
         test_list = []
-        
-        use_selected = True
+
         for row in self.table.selectionModel().selectedRows():
-            if self.table.isRowHidden(row.row()):
-                continue
-            
-            test_name = self.table.item(row.row(), 0).text()
+            test_name = self.proxy_model.data(row.sibling(row.row(), 0))
             test_list.append(test_name)
-        
+
         if not test_list:
-            use_selected = False
-            for i in range(0, self.table.rowCount()):
-                if self.table.isRowHidden(i):
-                    continue
-                
-                test_name = self.table.item(i, 0).text()
+            for i in range(0, self.proxy_model.rowCount()):
+                test_name = self.proxy_model.data(self.proxy_model.index(i, 0))
                 test_list.append(test_name)
 
             if not test_list:
                 test_list = ["all"]
-        
+
         results, stats = test(
             self.session,
             test_list,
             profile=self.profile.checkState() == Qt.Checked
         )
 
-        cell_widgets = []
-        
-        for name in results:
-            widget = QWidget()
-            widget_layout = QHBoxLayout(widget)
-            widget_layout.setContentsMargins(0, 0, 0, 0)
-            
-            success_button = get_button("success")
-            fail_button = get_button("fail")
-            skip_button = get_button("skip")
-            error_button = get_button("error")
-            expected_fail_button = get_button("expected fail")
-            unexpected_success_button = get_button("unexpected success")
-            
-            success_count = 0
-            fail_count = 0
-            error_count = 0
-            unexpected_success_count = 0
-            expected_fail_count = 0
-            skip_count = 0
-            
-            success_tooltip = "Successes:\n"
-            fail_tooltip = "Failed tests:\n"
-            error_tooltip = "Errors during test:\n"
-            unexpected_success_tooltip = "Unexpected successes:\n"
-            expected_fail_tooltip = "Expected fails:\n"
-            skip_tooltip = "Skipped tests:\n"
-
-            for case in results[name]:
-                result, msg = results[name][case]
-                if result == "success":
-                    success_count += 1
-                    success_tooltip += "%s.%s: %s\n" % (case.__class__.__qualname__, case._testMethodName, msg)
-                
-                elif result == "fail":
-                    fail_count += 1
-                    fail_tooltip += "%s.%s failed: %s\n" % (case.__class__.__qualname__, case._testMethodName, msg)
-                
-                elif result == "error":
-                    error_count += 1
-                    error_tooltip += "error during %s.%s: %s\n" % (case.__class__.__qualname__, case._testMethodName, msg)
-
-                elif result == "expected_failure":
-                    expected_fail_count += 1
-                    expected_fail_tooltip += "intended failure during %s.%s: %s\n" % (case.__class__.__qualname__, case._testMethodName, msg)
-
-                elif result == "skip":
-                    skip_count += 1
-                    skip_tooltip += "%s.%s\n" % (case.__class__.__qualname__, case._testMethodName)
-
-                elif result == "unexpected_success":
-                    unexpected_success_count += 1
-                    unexpected_success_tooltip += "%s.%s should not have worked, but did\n" % (case.__class__.__qualname__, case._testMethodName)
-            
-            success_tooltip = success_tooltip.strip()
-            fail_tooltip = fail_tooltip.strip()
-            error_tooltip = error_tooltip.strip()
-            expected_fail_tooltip = expected_fail_tooltip.strip()
-            skip_tooltip = skip_tooltip.strip()
-            unexpected_success_tooltip = unexpected_success_tooltip.strip()
-            
-            icon_count = 0
-            if success_count:
-                success_button.setText("%i" % success_count)
-                success_button.setToolTip(success_tooltip)
-                success_button.clicked.connect(
-                    lambda *args, t_name=name, res=success_tooltip: self.tool_window.create_child_window(
-                        "successes for %s" % t_name,
-                        text=res,
-                        window_class=ResultsWindow,
-                    )
-                )
-                widget_layout.insertWidget(icon_count, success_button, 1)
-                icon_count += 1
-            
-            if fail_count:
-                fail_button.setText("%i" % fail_count)
-                fail_button.setToolTip(fail_tooltip)
-                fail_button.clicked.connect(
-                    lambda *args, res=fail_tooltip: self.tool_window.create_child_window(
-                        "failures for %s" % name,
-                        text=res,
-                        window_class=ResultsWindow,
-                    )
-                )
-                widget_layout.insertWidget(icon_count, fail_button, 1)
-                icon_count += 1
-            
-            if error_count:
-                error_button.setText("%i" % error_count)
-                error_button.setToolTip(error_tooltip)
-                error_button.clicked.connect(
-                    lambda *args, res=error_tooltip: self.tool_window.create_child_window(
-                        "errors for %s" % name,
-                        text=res,
-                        window_class=ResultsWindow,
-                    )
-                )
-                widget_layout.insertWidget(icon_count, error_button, 1)
-                icon_count += 1
-            
-            if unexpected_success_count:
-                unexpected_success_button.setText("%i" % unexpected_success_count)
-                unexpected_success_button.setToolTip(unexpected_success_tooltip)
-                unexpected_success_button.clicked.connect(
-                    lambda *args, res=unexpected_success_tooltip: self.tool_window.create_child_window(
-                        "unexpected successes for %s" % name,
-                        text=res,
-                        window_class=ResultsWindow,
-                    )
-                )
-                widget_layout.insertWidget(icon_count, unexpected_success_button, 1)
-                icon_count += 1
-            
-            if expected_fail_count:
-                expected_fail_button.setText("%i" % expected_fail_count)
-                expected_fail_button.setToolTip(expected_fail_tooltip)
-                expected_fail_button.clicked.connect(
-                    lambda *args, res=expected_fail_tooltip: self.tool_window.create_child_window(
-                        "expected failures for %s" % name,
-                        text=res,
-                        window_class=ResultsWindow,
-                    )
-                )
-                widget_layout.insertWidget(icon_count, expected_fail_button, 1)
-                icon_count += 1
-            
-            if skip_count:
-                skip_button.setText("%i" % skip_count)
-                skip_button.setToolTip(skip_tooltip)
-                skip_button.clicked.connect(
-                    lambda *args, res=skip_tooltip: self.tool_window.create_child_window(
-                        "skipped tests for %s" % name,
-                        text=res,
-                        window_class=ResultsWindow,
-                    )
-                )
-                widget_layout.insertWidget(icon_count, skip_button, 1)
-                
-            cell_widgets.append(widget)    
-        
-        widget_count = 0
-        if use_selected:
-            for row in self.table.selectionModel().selectedRows():
-                if self.table.isRowHidden(row.row()):
-                    continue
-                
-                self.table.setCellWidget(row.row(), 1, cell_widgets[widget_count])
-                self.table.resizeRowToContents(row.row())
-                widget_count += 1
-
-        else:
-            for i in range(0, self.table.rowCount()):
-                if self.table.isRowHidden(i):
-                    continue
-                
-                self.table.setCellWidget(i, 1, cell_widgets[widget_count])
-                # self.table.resizeRowToContents(i)
-                widget_count += 1
+        self.results_model.set_results(results)
 
         if self.profile.checkState() == Qt.Checked:
             self.tool_window.create_child_window(
@@ -344,19 +431,134 @@ class TestRunner(ToolInstance):
 class ResultsWindow(ChildToolWindow):
     def __init__(self, tool_instance, title, text="", **kwargs):
         super().__init__(tool_instance, title, statusbar=False, **kwargs)
-        
+
         self._build_ui()
-        
+
         self.results.setText(text)
 
     def _build_ui(self):
         layout = QVBoxLayout()
-        
+
         self.results = QTextBrowser()
         font = QFontDatabase.systemFont(QFontDatabase.FixedFont)
         self.results.setFont(font)
         layout.insertWidget(0, self.results, 1)
-        
+
+        self.ui_area.setLayout(layout)
+
+        self.manage(None)
+
+
+class TableModel(QAbstractTableModel):
+    """read-only table of rows (tuples) with the given column headers"""
+    def __init__(self, headers, parent=None):
+        super().__init__(parent)
+        self._headers = headers
+        self._rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self._headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in [Qt.DisplayRole, Qt.ToolTipRole]:
+            return None
+        value = self._rows[index.row()][index.column()]
+        if isinstance(value, float):
+            # keep the number so the column sorts numerically
+            return round(value, 3)
+        return value
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self._rows = list(rows)
+        self.endResetModel()
+
+
+class HistoryWindow(ChildToolWindow):
+    """
+    pick two runs from the results history and show the tests that
+    changed status and how much slower or faster tests and providers got
+    """
+    def __init__(self, tool_instance, title, **kwargs):
+        super().__init__(tool_instance, title, statusbar=False, **kwargs)
+
+        self.history = tool_instance.session.test_manager.history
+        self._build_ui()
+
+    def _build_ui(self):
+        from time import localtime, strftime
+
+        layout = QFormLayout()
+
+        self.run_a = QComboBox()
+        self.run_b = QComboBox()
+        for run_id, started, description, num_tests, num_failed in self.history.runs():
+            label = "%i: %s  %s (%i tests, %i failed)" % (
+                run_id,
+                strftime("%Y-%m-%d %H:%M", localtime(started)),
+                description or "",
+                num_tests,
+                num_failed,
+            )
+            self.run_a.addItem(label, run_id)
+            self.run_b.addItem(label, run_id)
+        # compare the last two runs by default
+        self.run_a.setCurrentIndex(min(1, self.run_a.count() - 1))
+        self.run_a.currentIndexChanged.connect(self.compare)
+        self.run_b.currentIndexChanged.connect(self.compare)
+        layout.addRow("run A:", self.run_a)
+        layout.addRow("run B:", self.run_b)
+
+        self.status_model = TableModel(["provider", "test", "status A", "status B"])
+        self.test_model = TableModel(
+            ["provider", "test", "time A (s)", "time B (s)", "change (s)"]
+        )
+        self.provider_model = TableModel(
+            ["provider", "time A (s)", "time B (s)", "change (s)"]
+        )
+        tabs = QTabWidget()
+        # the time tabs start with the biggest slowdown at the top
+        for model, name, sort_column, sort_order in [
+            (self.status_model, "status changes", 0, Qt.AscendingOrder),
+            (self.test_model, "test times", 4, Qt.DescendingOrder),
+            (self.provider_model, "provider times", 3, Qt.DescendingOrder),
+        ]:
+            proxy_model = QSortFilterProxyModel(self)
+            proxy_model.setSourceModel(model)
+            table = QTableView()
+            table.setModel(proxy_model)
+            table.setSortingEnabled(True)
+            table.sortByColumn(sort_column, sort_order)
+            table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+            table.setSelectionBehavior(QAbstractItemView.SelectRows)
+            table.horizontalHeader().setStretchLastSection(True)
+            table.verticalHeader().setVisible(False)
+            tabs.addTab(table, name)
+        layout.addRow(tabs)
+
         self.ui_area.setLayout(layout)
-        
-        self.manage(None)
\ No newline at end of file
+        self.compare()
+        self.manage(None)
+
+    def compare(self, *args):
+        """show the comparison of the selected runs"""
+        run_a = self.run_a.currentData()
+        run_b = self.run_b.currentData()
+        if run_a is None or run_b is None:
+            return
+        comparison = self.history.compare(run_a, run_b)
+        self.status_model.set_rows(comparison.status_changes)
+        self.test_model.set_rows(comparison.test_durations)
+        self.provider_model.set_rows(comparison.provider_durations)
@@ -1,25 +1,88 @@
+DISTANCE_CHUNK_SIZE = 512
+"number of atoms per block when comparing distances"
+
+
 def rmsd_tol(struc, superTight=False, superLoose=False):
     """
     Automatically determine a reasonable rmsd tolerance for the input
     AtomicStructure based on its size and number of atoms
     """
+    return coords_rmsd_tol(
+        struc.active_coordset.xyzs, superTight=superTight, superLoose=superLoose
+    )
+
+
+def coords_rmsd_tol(coords, superTight=False, superLoose=False):
+    """
+    same as rmsd_tol, but for an array of coordinates
+    """
     import numpy as np
-    tolerance = struc.num_atoms ** (
+    tolerance = len(coords) ** (
         2 - int(superTight) + int(superLoose)
     ) * np.sqrt(np.finfo(float).eps)
 
-    com = np.mean(struc.active_coordset.xyzs, axis=0)
-    max_d = None
-    for atom in struc.atoms:
-        d = np.linalg.norm(atom.coord - com)
-        if max_d is None or d > max_d:
-            max_d = d
+    com = np.mean(coords, axis=0)
+    max_d = np.max(np.linalg.norm(coords - com, axis=1))
 
     tolerance *= max_d * (2 - int(superTight) + int(superLoose))
     tolerance = tolerance ** (2 / (4 - int(superTight) + int(superLoose)))
     return tolerance
 
 
+def _get_thresh(thresh, coords):
+    """convert the thresh argument of the validate functions to a number"""
+    if thresh is None:
+        return coords_rmsd_tol(coords)
+    try:
+        return float(thresh)
+    except ValueError:
+        if thresh.lower() == "tight":
+            return coords_rmsd_tol(coords, superTight=True)
+        elif thresh.lower() == "loose":
+            return coords_rmsd_tol(coords, superLoose=True)
+        else:
+            raise ValueError("Bad threshold provided")
+
+
+def superposition(ref_coords, test_coords):
+    """
+    returns the rotation matrix, ref centroid, and test centroid that
+    superimpose test_coords onto ref_coords:
+        aligned = np.dot(test_coords - test_centroid, R) + ref_centroid
+    """
+    import numpy as np
+
+    ref_com = np.mean(ref_coords, axis=0)
+    test_com = np.mean(test_coords, axis=0)
+
+    H = np.dot((ref_coords - ref_com).T, test_coords - test_com)
+    u, s, vh = np.linalg.svd(H, compute_uv=True)
+    d = 1.
+    if np.linalg.det(np.matmul(vh.T, u.T)) < 0:
+        d = -1.
+    m = np.diag([1., 1., d])
+    R = np.matmul(vh.T, m)
+    R = np.matmul(R, u.T)
+
+    return R, ref_com, test_com
+
+
+def kabsch_rmsd(ref_coords, test_coords):
+    """
+    superimpose test_coords onto ref_coords
+    returns RMSD, centered ref_coords, and aligned test_coords
+    """
+    import numpy as np
+
+    R, ref_com, test_com = superposition(ref_coords, test_coords)
+    ref_coords = ref_coords - ref_com
+    aligned_coords = np.dot(test_coords - test_com, R)
+
+    diff = ref_coords - aligned_coords
+    rmsd = np.sqrt(np.sum(diff * diff) / len(diff))
+    return rmsd, ref_coords, aligned_coords
+
+
 def check_atom_list(ref, comp):
     rv = True
     for i, j in zip(ref, comp):
@@ -27,6 +90,501 @@ def check_atom_list(ref, comp):
     return rv
 
 
+def atom_mask(struc, atoms):
+    """
+    returns a boolean array for struc.atoms
+    atoms: atom spec (evaluated for struc only), Atoms, boolean
+        array, or array of atom indices
+        Atoms can belong to another structure - their indices in
+        that structure are used for struc
+    """
+    if isinstance(atoms, str):
+        from chimerax.core.commands import AtomSpecArg
+        spec, _, _ = AtomSpecArg.parse(atoms, struc.session)
+        atoms = spec.evaluate(struc.session, models=[struc]).atoms
+        return struc.atoms.mask(atoms)
+    from chimerax.atomic import Atoms
+    if isinstance(atoms, Atoms):
+        if len(atoms) == 0:
+            return _array_mask([], struc.num_atoms)
+        structures = atoms.unique_structures
+        if len(structures) != 1:
+            raise ValueError("atoms must all be from one structure")
+        atoms = structures[0].atoms.indices(atoms)
+    return _array_mask(atoms, struc.num_atoms)
+
+
+def _array_mask(atoms, num_atoms):
+    """boolean array from a boolean array or array of indices"""
+    import numpy as np
+
+    if atoms is None:
+        return None
+    atoms = np.asarray(atoms)
+    if atoms.dtype == bool:
+        if len(atoms) != num_atoms:
+            raise ValueError(
+                "atom mask has %i entries for %i atoms" % (len(atoms), num_atoms)
+            )
+        return atoms
+    mask = np.zeros(num_atoms, dtype=bool)
+    # an empty list would otherwise be a float array, which can't index
+    mask[atoms.astype(np.intp, copy=False)] = True
+    return mask
+
+
+def _bond_keys(bonds, num_atoms):
+    """encode each (i, j) bond as a single integer"""
+    import numpy as np
+    bonds = np.asarray(bonds, dtype=np.int64).reshape(-1, 2)
+    return bonds[:, 0] * num_atoms + bonds[:, 1]
+
+
+def _keys_to_bonds(keys, num_atoms):
+    import numpy as np
+    return np.column_stack((keys // num_atoms, keys % num_atoms)).astype(np.int32)
+
+
+class ValidationReport:
+    """
+    details of a comparison between a test structure and a reference
+    evaluates to True if the validation passed
+
+    all atom indices refer to the order of the reference's atoms
+    text is only generated when render() is called
+    """
+    def __init__(self, thresh):
+        import numpy as np
+        self.passed = False
+        self.reason = None
+        "why the validation failed"
+        self.thresh = thresh
+        "RMSD threshold"
+        self.rmsd = None
+        self.num_atoms = (0, 0)
+        "number of atoms in (test, ref)"
+        self.element_mismatches = np.zeros(0, dtype=np.int32)
+        "indices of atoms with different elements"
+        self.missing_bonds = np.zeros((0, 2), dtype=np.int32)
+        "bonds in the reference that are not in the test structure"
+        self.extra_bonds = np.zeros((0, 2), dtype=np.int32)
+        "bonds in the test structure that are not in the reference"
+        self.deviations = None
+        "distance between each atom and the reference after alignment, NaN for atoms that were not compared"
+        self.residue_rmsd = None
+        "RMSD of each residue in self.residues"
+        self.chain_ids = None
+        self.chain_rmsd = None
+        "RMSD of each chain in self.chain_ids"
+        self.test_elements = None
+        self.ref_elements = None
+        self.atoms = None
+        "reference atoms, used to label atoms"
+        self.residues = None
+        "reference residues, used to label residues"
+        self.method = "rmsd"
+        "'rmsd' for aligned coordinates, 'distances' for internal distances"
+        self.cutoff = None
+        "only distances below this in the reference were compared"
+        self.pairs_compared = 0
+        self.max_distance_deviation = None
+        self.worst_pair = None
+        "(i, j) of the atom pair with the largest distance deviation"
+
+    def __bool__(self):
+        return bool(self.passed)
+
+    def __str__(self):
+        return self.render()
+
+    def fail(self, reason):
+        self.passed = False
+        self.reason = reason
+        return self
+
+    def atom_label(self, i):
+        if self.atoms is not None:
+            return self.atoms[i].atomspec
+        return "atom %i" % (i + 1)
+
+    def residue_label(self, i):
+        if self.residues is not None:
+            return self.residues[i].atomspec
+        return "residue %i" % (i + 1)
+
+    def element_label(self, number):
+        try:
+            from chimerax.atomic import Element
+            return Element.get_element(int(number)).name
+        except ImportError:
+            return "Z=%i" % number
+
+    @staticmethod
+    def _worst(values, k):
+        import numpy as np
+        k = min(k, len(values))
+        if k == 0:
+            return np.zeros(0, dtype=int)
+        ndx = np.argpartition(-values, k - 1)[:k]
+        return ndx[np.argsort(-values[ndx])]
+
+    def worst_atoms(self, k=10):
+        """indices of the k atoms with the largest deviation"""
+        if self.deviations is None:
+            return []
+        return self._worst(self.deviations, k)
+
+    def worst_residues(self, k=10):
+        """indices of the k residues with the largest RMSD"""
+        if self.residue_rmsd is None:
+            return []
+        return self._worst(self.residue_rmsd, k)
+
+    def render(self, max_lines=10):
+        """
+        text summary of the report
+        max_lines: maximum number of atoms, bonds, etc. listed in each section
+        """
+        import numpy as np
+
+        lines = []
+        if self.passed:
+            lines.append("validation passed")
+        else:
+            lines.append("validation failed: %s" % self.reason)
+        lines.append("atoms: %i (test) vs. %i (ref)" % self.num_atoms)
+        if self.rmsd is not None and self.method == "distances":
+            lines.append(
+                "distance RMSD: %.5f    threshold: %.5f" % (self.rmsd, self.thresh)
+            )
+            lines.append("atom pairs compared: %i%s" % (
+                self.pairs_compared,
+                "" if self.cutoff is None else " (cutoff %.2f)" % self.cutoff,
+            ))
+            if self.worst_pair is not None:
+                lines.append("largest distance deviation: %s-%s %.5f" % (
+                    self.atom_label(self.worst_pair[0]),
+                    self.atom_label(self.worst_pair[1]),
+                    self.max_distance_deviation,
+                ))
+        elif self.rmsd is not None:
+            lines.append("RMSD: %.5f    threshold: %.5f" % (self.rmsd, self.thresh))
+
+        def section(title, items, fmt):
+            if len(items) == 0:
+                return
+            lines.append("%s (%i):" % (title, len(items)))
+            for item in items[:max_lines]:
+                lines.append("    " + fmt(item))
+            if len(items) > max_lines:
+                lines.append("    ... and %i more" % (len(items) - max_lines))
+
+        section(
+            "element mismatches", self.element_mismatches,
+            lambda i: "%-20s %s (test) vs. %s (ref)" % (
+                self.atom_label(i),
+                self.element_label(self.test_elements[i]),
+                self.element_label(self.ref_elements[i]),
+            ),
+        )
+        section(
+            "bonds missing from test", self.missing_bonds,
+            lambda b: "%s-%s" % (self.atom_label(b[0]), self.atom_label(b[1])),
+        )
+        section(
+            "extra bonds in test", self.extra_bonds,
+            lambda b: "%s-%s" % (self.atom_label(b[0]), self.atom_label(b[1])),
+        )
+        if self.deviations is not None:
+            worst = self.worst_atoms(max_lines)
+            lines.append("largest atom deviations:")
+            for i in worst:
+                if np.isnan(self.deviations[i]):
+                    break
+                lines.append("    %-20s %.5f" % (self.atom_label(i), self.deviations[i]))
+        if self.residue_rmsd is not None and len(self.residue_rmsd) > 1:
+            worst = self.worst_residues(max_lines)
+            lines.append("largest residue RMSDs:")
+            for i in worst:
+                if np.isnan(self.residue_rmsd[i]):
+                    break
+                lines.append("    %-20s %.5f" % (self.residue_label(i), self.residue_rmsd[i]))
+        if self.chain_rmsd is not None and len(self.chain_rmsd) > 1:
+            lines.append("chain RMSDs:")
+            for chain_id, rmsd in list(zip(self.chain_ids, self.chain_rmsd))[:max_lines]:
+                if np.isnan(rmsd):
+                    continue
+                lines.append("    %-20s %.5f" % (chain_id, rmsd))
+
+        return "\n".join(lines)
+
+
+def _grouped_rmsd(sq_dev, groups, num_groups=None):
+    """RMSD of each group, groups is the group index of each atom"""
+    import numpy as np
+    counts = np.bincount(groups, minlength=num_groups or 0)
+    sums = np.bincount(groups, weights=sq_dev, minlength=num_groups or 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.sqrt(sums / counts)
+
+
+def _all_pairs(num_atoms, chunk_size):
+    """
+    yields (i, j) index arrays with i < j for every pair of atoms,
+    at most chunk_size ** 2 pairs at a time
+    """
+    import numpy as np
+
+    for start in range(0, num_atoms, chunk_size):
+        rows = np.arange(start, min(start + chunk_size, num_atoms), dtype=np.int32)
+        for col_start in range(start, num_atoms, chunk_size):
+            cols = np.arange(
+                col_start, min(col_start + chunk_size, num_atoms), dtype=np.int32
+            )
+            i, j = np.meshgrid(rows, cols, indexing="ij")
+            mask = j > i
+            yield i[mask], j[mask]
+
+
+# cell offsets for the neighboring grid cells
+# only half of the neighbors are used so each pair is found once
+_HALF_SHELL = [(0, 0, 0)] + [
+    (dx, dy, dz)
+    for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+    if (dx, dy, dz) > (0, 0, 0)
+]
+
+
+def _grid_pairs(coords, cutoff, chunk_size):
+    """
+    yields (i, j) index arrays with i < j for pairs of atoms closer
+    than cutoff
+    atoms are binned on a grid with a spacing of cutoff so only atoms
+    in neighboring cells are checked
+    """
+    import numpy as np
+
+    num_atoms = len(coords)
+    cells = np.floor((coords - coords.min(axis=0)) / cutoff).astype(np.int64)
+    dims = cells.max(axis=0) + 1
+
+    def cell_key(c):
+        return (c[:, 0] * dims[1] + c[:, 1]) * dims[2] + c[:, 2]
+
+    keys = cell_key(cells)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    for start in range(0, num_atoms, chunk_size):
+        atoms = np.arange(start, min(start + chunk_size, num_atoms))
+        for offset in _HALF_SHELL:
+            neighbor_cells = cells[atoms] + offset
+            valid = np.all((neighbor_cells >= 0) & (neighbor_cells < dims), axis=1)
+            src = atoms[valid]
+            neighbor_keys = cell_key(neighbor_cells[valid])
+            first = np.searchsorted(sorted_keys, neighbor_keys, side="left")
+            counts = np.searchsorted(sorted_keys, neighbor_keys, side="right") - first
+            total = counts.sum()
+            if not total:
+                continue
+            i = np.repeat(src, counts)
+            pos = np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(total)
+            j = order[pos]
+            d = np.linalg.norm(coords[i] - coords[j], axis=1)
+            keep = d < cutoff
+            if offset == (0, 0, 0):
+                keep &= j > i
+            # make i < j for pairs found from neighboring cells
+            i, j = np.minimum(i[keep], j[keep]), np.maximum(i[keep], j[keep])
+            yield i, j
+
+
+def _accumulate(target, ndx, weights=None):
+    """target[ndx] += weights, allowing repeated indices"""
+    import numpy as np
+
+    if len(ndx) == 0:
+        return
+    lo, hi = ndx.min(), ndx.max()
+    if hi - lo < 4 * len(ndx):
+        target[lo:hi + 1] += np.bincount(ndx - lo, weights=weights, minlength=hi - lo + 1)
+    else:
+        np.add.at(target, ndx, 1 if weights is None else weights)
+
+
+def _compare_distances(
+    test_coords,
+    ref_coords,
+    report,
+    cutoff=None,
+    chunk_size=DISTANCE_CHUNK_SIZE,
+    selected=None,
+):
+    """
+    compare the internal distances of test_coords and ref_coords
+    without aligning them
+    distances are computed in blocks with float32 buffers, so memory
+    use does not grow with the square of the number of atoms
+    if cutoff is given, only pairs of atoms closer than cutoff in
+    the reference are compared
+    selected: indices of the atoms to compare (default: all)
+    """
+    import numpy as np
+
+    num_atoms = len(ref_coords)
+    if selected is None:
+        selected = np.arange(num_atoms)
+    ref_coords = np.asarray(ref_coords[selected], dtype=np.float32)
+    test_coords = np.asarray(test_coords[selected], dtype=np.float32)
+
+    if cutoff is None:
+        pairs = _all_pairs(len(selected), chunk_size)
+    else:
+        pairs = _grid_pairs(ref_coords, cutoff, chunk_size)
+
+    sq_sum = 0.
+    count = 0
+    max_dev = 0.
+    worst_pair = None
+    atom_sq = np.zeros(num_atoms)
+    atom_count = np.zeros(num_atoms)
+    for i, j in pairs:
+        if len(i) == 0:
+            continue
+        dev = (
+            np.linalg.norm(test_coords[i] - test_coords[j], axis=1) -
+            np.linalg.norm(ref_coords[i] - ref_coords[j], axis=1)
+        )
+        sq = np.square(dev, dtype=np.float64)
+        sq_sum += sq.sum()
+        count += len(sq)
+        i = selected[i]
+        j = selected[j]
+        k = np.argmax(sq)
+        if abs(dev[k]) > max_dev or worst_pair is None:
+            max_dev = abs(float(dev[k]))
+            worst_pair = (int(i[k]), int(j[k]))
+        for ndx in (i, j):
+            _accumulate(atom_sq, ndx, sq)
+            _accumulate(atom_count, ndx)
+
+    report.method = "distances"
+    report.cutoff = cutoff
+    report.pairs_compared = count
+    report.max_distance_deviation = max_dev
+    report.worst_pair = worst_pair
+    report.rmsd = np.sqrt(sq_sum / count) if count else 0.
+    with np.errstate(invalid="ignore", divide="ignore"):
+        report.deviations = np.sqrt(atom_sq / atom_count)
+    report.passed = report.rmsd < report.thresh
+    if not report.passed:
+        report.reason = "distance RMSD is above the threshold"
+
+    return report
+
+
+def _compare_arrays(
+    test,
+    ref,
+    report,
+    method="rmsd",
+    cutoff=None,
+    chunk_size=DISTANCE_CHUNK_SIZE,
+    mask=None,
+    align_mask=None,
+    test_mask=None,
+):
+    """
+    compare structure_arrays of test and ref, filling in report
+    method is "rmsd" or "distances" (see validate_atomic_structures)
+    mask: boolean array of the atoms to compare (default: all)
+    align_mask: boolean array of the atoms used for superposition
+        (default: mask)
+    test_mask: mask evaluated for the test structure, which must be
+        the same as mask
+    returns report
+    """
+    import numpy as np
+
+    report.num_atoms = (len(test["elements"]), len(ref["elements"]))
+    if report.num_atoms[0] != report.num_atoms[1]:
+        return report.fail("wrong number of atoms")
+    n = report.num_atoms[1]
+
+    if test_mask is not None and not np.array_equal(test_mask, mask):
+        return report.fail("atom selections differ between test and ref")
+    selected = np.arange(n) if mask is None else np.nonzero(mask)[0]
+    if align_mask is None:
+        align_mask = mask
+    aligned = selected if align_mask is None else np.nonzero(align_mask)[0]
+    if len(selected) == 0 or len(aligned) == 0:
+        return report.fail("no atoms selected")
+
+    report.test_elements = test["elements"]
+    report.ref_elements = ref["elements"]
+    report.element_mismatches = selected[np.nonzero(
+        np.asarray(test["elements"])[selected] != np.asarray(ref["elements"])[selected]
+    )[0]]
+    if len(report.element_mismatches):
+        return report.fail("elements don't match")
+
+    test_bonds = np.asarray(test["bonds"])
+    ref_bonds = np.asarray(ref["bonds"])
+    if mask is not None:
+        # only bonds between selected atoms
+        test_bonds = test_bonds[np.all(mask[test_bonds], axis=1)]
+        ref_bonds = ref_bonds[np.all(mask[ref_bonds], axis=1)]
+    test_keys = _bond_keys(test_bonds, n)
+    ref_keys = _bond_keys(ref_bonds, n)
+    report.missing_bonds = _keys_to_bonds(np.setdiff1d(ref_keys, test_keys), n)
+    report.extra_bonds = _keys_to_bonds(np.setdiff1d(test_keys, ref_keys), n)
+    if len(report.missing_bonds) or len(report.extra_bonds):
+        return report.fail("connectivity differs")
+
+    if method == "distances":
+        return _compare_distances(
+            test["coords"], ref["coords"], report,
+            cutoff=cutoff, chunk_size=chunk_size, selected=selected,
+        )
+    elif method != "rmsd":
+        raise ValueError("unknown validation method: %s" % method)
+
+    ref_coords = np.asarray(ref["coords"])
+    test_coords = np.asarray(test["coords"])
+    R, ref_com, test_com = superposition(ref_coords[aligned], test_coords[aligned])
+    aligned_coords = np.dot(test_coords[selected] - test_com, R)
+    sq_dev = np.sum((ref_coords[selected] - ref_com - aligned_coords) ** 2, axis=1)
+    report.rmsd = np.sqrt(np.mean(sq_dev))
+    report.deviations = np.full(n, np.nan)
+    report.deviations[selected] = np.sqrt(sq_dev)
+    report.passed = report.rmsd < report.thresh
+    if not report.passed:
+        report.reason = "RMSD is above the threshold"
+
+    return report
+
+
+def _add_groups(report, ref):
+    """per-residue and per-chain RMSD of the atoms in report"""
+    import numpy as np
+
+    if report.deviations is None:
+        return report
+    compared = ~np.isnan(report.deviations)
+    sq_dev = report.deviations[compared] ** 2
+    residues = ref.residues
+    report.residues = residues
+    report.residue_rmsd = _grouped_rmsd(
+        sq_dev, residues.indices(ref.atoms.residues)[compared], len(residues)
+    )
+    chain_ids, chain_index = np.unique(
+        np.asarray(ref.atoms.residues.chain_ids), return_inverse=True
+    )
+    report.chain_ids = chain_ids
+    report.chain_rmsd = _grouped_rmsd(sq_dev, chain_index[compared], len(chain_ids))
+    return report
+
+
 def validate_elements(test, ref, debug=False):
     """
     Validates `test` atomic structure against `ref` atomic structure
@@ -34,10 +592,10 @@ def validate_elements(test, ref, debug=False):
     
     checks if elements match
     """
+    import numpy as np
 
-    # elements should all be the same
-    t_el = test.atoms.elements.names.tolist()
-    r_el = ref.atoms.elements.names.tolist()
+    t_el = np.asarray(test.atoms.elements.numbers)
+    r_el = np.asarray(ref.atoms.elements.numbers)
     if len(t_el) != len(r_el):
         if debug:
             print(
@@ -47,11 +605,10 @@ def validate_elements(test, ref, debug=False):
             )
         return False
 
-    for t, r in zip(t_el, r_el):
-        if t != r:
-            if debug:
-                print("elements don't match")
-            return False
+    if np.any(t_el != r_el):
+        if debug:
+            print("elements don't match")
+        return False
     
     return True
     
@@ -65,35 +622,39 @@ def validate_connectivity(test, ref, debug=False):
     """
     import numpy as np
 
-    test_con = np.zeros((test.num_atoms, test.num_atoms), dtype=int)
-    ref_con = np.zeros((ref.num_atoms, ref.num_atoms), dtype=int)
-    for i, (test_atom, ref_atom) in enumerate(zip(test.atoms, ref.atoms)):
-        for test_neighbor in test_atom.neighbors:
-            j = test.atoms.index(test_neighbor)
-            test_con[i,j] = 1
-            test_con[j,i] = 1
-        for ref_neighbor in ref_atom.neighbors:
-            j = ref.atoms.index(ref_neighbor)
-            ref_con[i,j] = 1
-            ref_con[j,i] = 1
-    
-    if np.any(ref_con - test_con) != 0:
+    report = ValidationReport(0)
+    report.atoms = ref.atoms
+    n = max(test.num_atoms, ref.num_atoms)
+    test_keys = _bond_keys(structure_arrays(test)["bonds"], n)
+    ref_keys = _bond_keys(structure_arrays(ref)["bonds"], n)
+    report.missing_bonds = _keys_to_bonds(np.setdiff1d(ref_keys, test_keys), n)
+    report.extra_bonds = _keys_to_bonds(np.setdiff1d(test_keys, ref_keys), n)
+
+    if len(report.missing_bonds) or len(report.extra_bonds):
         if debug:
-            con_diff = ref_con - test_con
-            print("connectivity differs")
-            for i in range(0, test.num_atoms):
-                for j in range(0, i):
-                    if con_diff[i,j] != 0:
-                        print("%s-%s" % (ref.atoms[i].atomspec, ref.atoms[j].atomspec))
+            report.fail("connectivity differs")
+            print(report.render())
         return False
     
     return True
 
 
-def validate_atomic_structures(test, ref, thresh=None, debug=False):
+def validate_atomic_structures(
+    test,
+    ref,
+    thresh=None,
+    debug=False,
+    report=False,
+    method="rmsd",
+    cutoff=None,
+    chunk_size=DISTANCE_CHUNK_SIZE,
+    atoms=None,
+    align_atoms=None,
+):
     """
     Validates `test` atomic structure against `ref` atomic structure
     Returns: True if validation passed, False if failed
+        or a ValidationReport if report=True
     
     checks number of atoms, elements, connectivity (not pseudo bonds), and RMSD
 
@@ -104,78 +665,389 @@ def validate_atomic_structures(test, ref, thresh=None, debug=False):
         if thresh is None: use rmsd_tol() to determine
         if thresh is "tight": use rmsd_tol(superTight=True)
         if thresh is "loose": use rmsd_tol(superLoose=True)
-    :debug: print info useful for debugging
+    :debug: print a summary of the differences
+    :report: return a ValidationReport with per-atom deviations,
+        per-residue and per-chain RMSD, and mismatched elements and bonds
+        the report evaluates to True if validation passed
+    :method: how coordinates are compared
+        "rmsd": RMSD after superimposing test onto ref
+        "distances": RMSD of the distances between atoms in each
+            structure (no superposition), computed in blocks of
+            chunk_size atoms
+    :cutoff: with method="distances", only compare the distances between
+        atoms that are closer than cutoff in ref
+    :atoms: only validate these atoms - an atom spec, Atoms, boolean
+        array, or array of atom indices
+        atom specs are evaluated separately for test and ref and must
+        select the same atoms in each
+        Atoms from either structure select the atoms with the same
+        indices in the other structure
+        only bonds between these atoms are checked
+    :align_atoms: atoms to use for superposition (default: atoms)
+        RMSD is still only calculated for atoms
+    """
+    ref_arrays = structure_arrays(ref)
+    mask = align_mask = test_mask = None
+    if atoms is not None:
+        mask = atom_mask(ref, atoms)
+        test_mask = atom_mask(test, atoms)
+    if align_atoms is not None:
+        align_mask = atom_mask(ref, align_atoms)
+    coords = ref_arrays["coords"] if mask is None else ref_arrays["coords"][mask]
+    validation = ValidationReport(_get_thresh(thresh, coords))
+    validation.atoms = ref.atoms
+    _compare_arrays(
+        structure_arrays(test), ref_arrays, validation,
+        method=method, cutoff=cutoff, chunk_size=chunk_size,
+        mask=mask, align_mask=align_mask, test_mask=test_mask,
+    )
+    if report or debug:
+        _add_groups(validation, ref)
+
+    if debug:
+        print(validation.render())
+
+    if report:
+        return validation
+    return validation.passed
+
+
+def structure_arrays(struc):
+    """
+    returns a dict with the arrays used to compare structures:
+        elements: atomic number of each atom
+        bonds: (N, 2) array of bonded atom indices, each row sorted and
+               the rows sorted lexicographically
+        coords: coordinates of each atom
     """
     import numpy as np
 
+    atoms = struc.atoms
+    atoms1, atoms2 = struc.bonds.atoms
+    bonds = np.column_stack((atoms.indices(atoms1), atoms.indices(atoms2)))
+    bonds = np.sort(bonds, axis=1).astype(np.int32)
+    bonds = bonds[np.lexsort((bonds[:, 1], bonds[:, 0]))]
+
+    return {
+        "elements": np.asarray(atoms.elements.numbers, dtype=np.uint8),
+        "bonds": bonds,
+        "coords": np.asarray(atoms.coords, dtype=np.float64),
+    }
+
+
+def validate_structure_arrays(
+    test,
+    ref,
+    thresh=None,
+    debug=False,
+    report=False,
+    method="rmsd",
+    cutoff=None,
+    chunk_size=DISTANCE_CHUNK_SIZE,
+    atoms=None,
+    align_atoms=None,
+):
+    """
+    Validates `test` structure arrays against `ref` structure arrays
+    (see structure_arrays)
+    Returns: True if validation passed, False if failed
+        or a ValidationReport if report=True
+
+    checks number of atoms, elements, bonds, and RMSD
+    thresh, method, cutoff, and chunk_size are the same as for
+    validate_atomic_structures
+    atoms and align_atoms can be boolean arrays or arrays of atom indices
+    """
+    n = len(ref["elements"])
+    mask = _array_mask(atoms, n)
+    align_mask = _array_mask(align_atoms, n)
+    coords = ref["coords"] if mask is None else ref["coords"][mask]
+    validation = ValidationReport(_get_thresh(thresh, coords))
+    _compare_arrays(
+        test, ref, validation,
+        method=method, cutoff=cutoff, chunk_size=chunk_size,
+        mask=mask, align_mask=align_mask,
+    )
+
     if debug:
-        print("ref and test:")
-        for mol in [ref, test]:
-            print(mol.num_atoms)
-            for atom in mol.atoms:
-                print(" %-10s    %6.3f    %6.3f    %6.3f" % (atom.atomspec, atom.coord[0], atom.coord[1], atom.coord[2]))
+        print(validation.render())
 
-    if thresh is None:
-        thresh = rmsd_tol(ref)
-    try:
-        thresh = float(thresh)
-    except ValueError:
-        if thresh.lower() == "tight":
-            thresh = rmsd_tol(ref, superTight=True)
-        elif thresh.lower() == "loose":
-            thresh = rmsd_tol(ref, superLoose=True)
+    if report:
+        return validation
+    return validation.passed
+
+
+VOLUME_CHUNK_VOXELS = 2 ** 22
+"approximate number of voxels compared at a time by validate_volumes"
+
+
+class _Grid:
+    """
+    uniform access to a grid of values from a Volume, GridData,
+    array, .npy file, or golden volume data
+    arrays are indexed (z, y, x) like ChimeraX's volume matrices
+    """
+    def __init__(self, data, origin=None, step=None):
+        import numpy as np
+
+        self.array = None
+        self.data = None
+        if isinstance(data, str):
+            data = np.load(data, mmap_mode="r")
+        if isinstance(data, dict):
+            origin = data.get("origin", origin)
+            step = data.get("step", step)
+            data = data["matrix"]
+        if hasattr(data, "data") and hasattr(data.data, "matrix"):
+            # Volume
+            data = data.data
+        if hasattr(data, "matrix"):
+            # GridData
+            self.data = data
+            self.size = tuple(int(x) for x in data.size)
+            origin = data.origin if origin is None else origin
+            step = data.step if step is None else step
         else:
-            raise ValueError("Bad threshold provided")
+            self.array = np.asarray(data) if not isinstance(data, np.ndarray) else data
+            if self.array.ndim != 3:
+                raise ValueError("grid data must be 3D, got %iD" % self.array.ndim)
+            self.size = tuple(int(x) for x in self.array.shape[::-1])
+        self.origin = np.zeros(3) if origin is None else np.asarray(origin, dtype=float)
+        self.step = np.ones(3) if step is None else np.asarray(step, dtype=float)
 
-    elements_valid = validate_elements(test, ref, debug=debug)
-    if not elements_valid:
-        if debug:
-            print("bad elements")
-        return elements_valid
+    def planes(self, z_start, z_end):
+        """values for z planes z_start to z_end (exclusive)"""
+        if self.array is not None:
+            return self.array[z_start:z_end]
+        return self.data.matrix(
+            ijk_origin=(0, 0, z_start),
+            ijk_size=(self.size[0], self.size[1], z_end - z_start),
+        )
 
-    connectivity_valid = validate_connectivity(test, ref, debug=debug)
-    if not connectivity_valid:
-        if debug:
-            print("bad connectivity")
-        return connectivity_valid
-    
-    # and RMSD should be below a threshold
-    ref_coords = ref.active_coordset.xyzs
-    ref_coords -= np.mean(ref_coords, axis=0)
-    test_coords = test.active_coordset.xyzs
-    test_coords -= np.mean(test_coords, axis=0)
-    
-    if debug:
-        print("ref centered:")
-        for atom, coord in zip(ref.atoms, ref_coords):
-                print(" %-10s    %6.3f    %6.3f    %6.3f" % (atom.atomspec, coord[0], coord[1], coord[2]))
-        print("test centered:")
-        for atom, coord in zip(test.atoms, test_coords):
-                print(" %-10s    %6.3f    %6.3f    %6.3f" % (atom.atomspec, coord[0], coord[1], coord[2]))
-
-    H = np.dot(ref_coords.T, test_coords)
-    u, s, vh = np.linalg.svd(H, compute_uv=True)
-    d = 1.
-    if np.linalg.det(np.matmul(vh.T, u.T)) < 0:
-        d = -1.
-    m = np.diag([1., 1., d])
-    R = np.matmul(vh.T, m)
-    R = np.matmul(R, u.T)
 
-    aligned_coords = np.dot(test_coords, R)
-    
-    diff = ref_coords - aligned_coords
-    rmsd = 0
-    for coord in diff:
-        rmsd += np.dot(coord, coord)
-    
-    rmsd /= test.num_atoms
-    rmsd = np.sqrt(rmsd)
-    
+class VolumeReport:
+    """
+    details of a comparison between a test grid and a reference grid
+    evaluates to True if the validation passed
+    """
+    def __init__(self):
+        self.passed = False
+        self.reason = None
+        self.size = (None, None)
+        "grid size (x, y, z) of (test, ref)"
+        self.origin_difference = None
+        self.step_difference = None
+        self.max_abs = None
+        "largest absolute difference between values"
+        self.worst_voxel = None
+        "(i, j, k) index of the largest difference"
+        self.rms = None
+        "RMS difference between values"
+        self.correlation = None
+        self.nonfinite_mismatches = 0
+        "number of voxels where test and ref differ in NaN or inf values"
+        self.nonfinite_voxel = None
+        "(i, j, k) index of the first such voxel"
+        self.thresholds = {}
+        "metric: threshold that was used"
+        self._ref_max = 0.
+
+    def __bool__(self):
+        return bool(self.passed)
+
+    def __str__(self):
+        return self.render()
+
+    def fail(self, reason):
+        self.passed = False
+        self.reason = reason
+        return self
+
+    def render(self):
+        lines = []
+        if self.passed:
+            lines.append("validation passed")
+        else:
+            lines.append("validation failed: %s" % self.reason)
+        lines.append("grid size: %s (test) vs. %s (ref)" % self.size)
+        if self.origin_difference is not None:
+            lines.append("origin difference: %.5g" % self.origin_difference)
+            lines.append("step difference: %.5g" % self.step_difference)
+        if self.nonfinite_mismatches:
+            lines.append("NaN/inf mismatches: %i    first at voxel %s" % (
+                self.nonfinite_mismatches, self.nonfinite_voxel
+            ))
+        for name in ["max_abs", "rms", "correlation"]:
+            value = getattr(self, name)
+            if value is None:
+                continue
+            line = "%-12s %.6g" % (name + ":", value)
+            if name in self.thresholds:
+                line += "    threshold: %.6g" % self.thresholds[name]
+            if name == "max_abs" and self.worst_voxel is not None:
+                line += "    at voxel %s" % (self.worst_voxel,)
+            lines.append(line)
+        return "\n".join(lines)
+
+
+def validate_volumes(
+    test,
+    ref,
+    max_abs=None,
+    rms=None,
+    correlation=None,
+    grid_tol=1e-5,
+    ref_origin=None,
+    ref_step=None,
+    chunk_voxels=VOLUME_CHUNK_VOXELS,
+    debug=False,
+    report=False,
+):
+    """
+    Validates `test` volume data against `ref` volume data
+    Returns: True if validation passed, False if failed
+        or a VolumeReport if report=True
+
+    checks grid size, origin, and step, then compares values
+    values are read a few z planes at a time, so large maps are
+    never copied in full
+    NaN and inf values must be in the same voxels in both grids, and
+    are left out of the differences and correlation
+
+    :test: Volume or GridData to validate
+    :ref: the reference - a Volume, GridData, (z, y, x) array, path to
+        a .npy file (which is memory-mapped), or golden volume data
+        from GoldenStore.load_volume
+    :max_abs: largest allowed absolute difference between values
+    :rms: largest allowed RMS difference between values
+    :correlation: smallest allowed correlation coefficient
+        if max_abs, rms, and correlation are all None, max_abs is
+        sqrt(float32 epsilon) times the largest absolute value of ref
+    :grid_tol: tolerance for differences in origin and step
+    :ref_origin, ref_step: origin and step of ref if it is an array or
+        .npy file (default (0, 0, 0) and (1, 1, 1))
+    :chunk_voxels: approximate number of voxels to compare at a time
+    :debug: print a summary of the differences
+    """
+    import numpy as np
+
+    validation = VolumeReport()
+    test = _Grid(test)
+    ref = _Grid(ref, origin=ref_origin, step=ref_step)
+
+    validation.size = (test.size, ref.size)
+    validation.origin_difference = float(np.max(np.abs(test.origin - ref.origin)))
+    validation.step_difference = float(np.max(np.abs(test.step - ref.step)))
+    if test.size != ref.size:
+        validation.fail("grid sizes differ")
+    elif validation.origin_difference > grid_tol:
+        validation.fail("grid origins differ")
+    elif validation.step_difference > grid_tol:
+        validation.fail("grid steps differ")
+    else:
+        _compare_grid_values(test, ref, validation, chunk_voxels)
+        if max_abs is None and rms is None and correlation is None:
+            max_abs = np.sqrt(np.finfo(np.float32).eps) * validation._ref_max
+        validation.passed = True
+        # written so that a NaN value fails
+        if max_abs is not None:
+            validation.thresholds["max_abs"] = max_abs
+            if not validation.max_abs <= max_abs:
+                validation.fail("largest difference is above the threshold")
+        if rms is not None:
+            validation.thresholds["rms"] = rms
+            if not validation.rms <= rms:
+                validation.fail("RMS difference is above the threshold")
+        if correlation is not None:
+            validation.thresholds["correlation"] = correlation
+            if not validation.correlation >= correlation:
+                validation.fail("correlation is below the threshold")
+        if validation.nonfinite_mismatches:
+            validation.fail("NaN or inf values differ at %i voxels" % (
+                validation.nonfinite_mismatches
+            ))
+
     if debug:
-        print("RMSD:", rmsd, "\tTHRESH:", thresh)
-        print(test.num_atoms)
-        for atom, new_coord in zip(test.atoms, aligned_coords):
-            print(" %-10s    %6.3f    %6.3f    %6.3f" % (atom.atomspec, new_coord[0], new_coord[1], new_coord[2]))
+        print(validation.render())
+
+    if report:
+        return validation
+    return validation.passed
+
+
+def _compare_grid_values(test, ref, report, chunk_voxels):
+    """
+    stream over blocks of z planes to get the largest difference,
+    RMS difference, and correlation of the values
+    means and co-moments are merged block by block (Chan et al.) so
+    the correlation is accurate for large grids
+    voxels where either value is NaN or inf are counted as mismatches
+    (unless both values are the same) and are not used for anything else
+    """
+    import numpy as np
+
+    nx, ny, nz = ref.size
+    planes = max(1, chunk_voxels // max(1, nx * ny))
+    count = 0
+    mean_t = mean_r = 0.
+    m2_t = m2_r = c_tr = 0.
+    sq_sum = 0.
+    max_abs = 0.
+    ref_max = 0.
+    worst = None
+    for z in range(0, nz, planes):
+        t = np.asarray(test.planes(z, min(z + planes, nz)), dtype=np.float64)
+        r = np.asarray(ref.planes(z, min(z + planes, nz)), dtype=np.float64)
+        finite = np.isfinite(t) & np.isfinite(r)
+        mismatched = ~finite & (t != r) & ~(np.isnan(t) & np.isnan(r))
+        if mismatched.any():
+            if not report.nonfinite_mismatches:
+                dz, dy, dx = np.unravel_index(int(np.argmax(mismatched)), t.shape)
+                report.nonfinite_voxel = (int(dx), int(dy), int(z + dz))
+            report.nonfinite_mismatches += int(np.count_nonzero(mismatched))
+
+        with np.errstate(invalid="ignore"):
+            diff = np.where(finite, np.abs(t - r), 0)
+        k = int(np.argmax(diff))
+        if worst is None or diff.flat[k] > max_abs:
+            max_abs = float(diff.flat[k])
+            dz, dy, dx = np.unravel_index(k, diff.shape)
+            worst = (int(dx), int(dy), int(z + dz))
+        sq_sum += float(np.sum(diff * diff))
+
+        if not finite.all():
+            t = t[finite]
+            r = r[finite]
+        n = t.size
+        if n == 0:
+            continue
+        ref_max = max(ref_max, float(np.max(np.abs(r))))
+        block_mean_t = t.mean()
+        block_mean_r = r.mean()
+        dt = t - block_mean_t
+        dr = r - block_mean_r
+        block_m2_t = float(np.sum(dt * dt))
+        block_m2_r = float(np.sum(dr * dr))
+        block_c_tr = float(np.sum(dt * dr))
+        total = count + n
+        delta_t = block_mean_t - mean_t
+        delta_r = block_mean_r - mean_r
+        m2_t += block_m2_t + delta_t * delta_t * count * n / total
+        m2_r += block_m2_r + delta_r * delta_r * count * n / total
+        c_tr += block_c_tr + delta_t * delta_r * count * n / total
+        mean_t += delta_t * n / total
+        mean_r += delta_r * n / total
+        count = total
 
-    return rmsd < thresh
+    report.max_abs = max_abs
+    report.worst_voxel = worst
+    report.rms = np.sqrt(sq_sum / count) if count else 0.
+    if m2_t > 0 and m2_r > 0:
+        report.correlation = c_tr / np.sqrt(m2_t * m2_r)
+    elif m2_t == m2_r == 0 and mean_t == mean_r:
+        # constant grids with the same value
+        report.correlation = 1.
+    else:
+        report.correlation = 0.
+    report._ref_max = ref_max
+    return report